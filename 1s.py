@@ -3,34 +3,120 @@ import os
 import logging
 from datetime import datetime
 
+from comun import leer_archivo, convertir_fechas, guardar_csv, nombre_salida
+
 # Configuración de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Función para buscar y emparejar archivos CSV y DAT en la carpeta de entrada
+# Esquemas declarados: columna usada -> dtype. El CSV se reescribe completo y conserva
+# el texto original de todas sus columnas; del DAT solo se leen las declaradas.
+ESQUEMA_CSV = {
+    'nro_papeleta': 'str', 'fecha_cobro': 'str',
+    'der_intereses': 'str', 'obl_intereses': 'str', 'der_vp': 'str', 'obl_vp': 'str',
+}
+ESQUEMA_DAT = {
+    'M_CONTRACT': 'str', 'M_DATE': 'str', 'M_LEG': 'str',
+    'M_FLOW_COL': 'float64', 'M_DISCFLOW': 'float64',
+}
+
+# Formato de M_DATE en el DAT y de fecha_cobro en el CSV
+FORMATO_FECHA = '%d/%m/%Y'
+
+# Función para buscar y emparejar archivos CSV y DAT en la carpeta de entrada.
+# Devuelve los pares (csv, dat) y la lista de archivos que quedaron sin pareja.
 def emparejar_archivos(ruta_data):
     archivos = os.listdir(ruta_data)
     pares = []
+    sin_pareja = []
 
     archivos_csv = [f for f in archivos if f.startswith("flujos_swap_gbo_") and f.endswith(".csv")]
     archivos_dat = [f for f in archivos if f.startswith("COL_ESTIM_FLOWS_") and f.endswith(".dat")]
 
+    # Indexar los DAT por fecha una sola vez
+    dat_por_fecha = {}
+    for dat in archivos_dat:
+        fecha_dat = dat[len("COL_ESTIM_FLOWS_"):-len(".dat")]
+        try:
+            fecha_dat_dt = datetime.strptime(fecha_dat, "%d%m%Y")
+        except ValueError:
+            sin_pareja.append({'archivo': dat, 'tipo': 'dat', 'motivo': 'fecha inválida'})
+            continue
+        dat_por_fecha.setdefault(fecha_dat_dt, []).append(dat)
+
+    fechas_emparejadas = set()
     for csv in archivos_csv:
-        fecha_csv = csv.replace("flujos_swap_gbo_", "").replace(".csv", "")
+        fecha_csv = csv[len("flujos_swap_gbo_"):-len(".csv")]
         try:
             fecha_csv_dt = datetime.strptime(fecha_csv, "%Y%m%d")
-            fecha_dat_buscar = fecha_csv_dt.strftime("%d%m%Y")
-
-            for dat in archivos_dat:
-                if fecha_dat_buscar in dat:
-                    pares.append((csv, dat))
         except ValueError:
-            logging.warning(f"Formato de fecha inválido en el archivo: {csv}")
-
-    return pares
+            sin_pareja.append({'archivo': csv, 'tipo': 'csv', 'motivo': 'fecha inválida'})
+            continue
+
+        dats = dat_por_fecha.get(fecha_csv_dt)
+        if not dats:
+            sin_pareja.append({'archivo': csv, 'tipo': 'csv', 'motivo': 'sin DAT para la fecha'})
+            continue
+
+        fechas_emparejadas.add(fecha_csv_dt)
+        for dat in dats:
+            pares.append((csv, dat))
+
+    for fecha_dat_dt, dats in dat_por_fecha.items():
+        if fecha_dat_dt not in fechas_emparejadas:
+            for dat in dats:
+                sin_pareja.append({'archivo': dat, 'tipo': 'dat', 'motivo': 'sin CSV para la fecha'})
+
+    return pares, sin_pareja
+
+# M_LEG -> (columna destino de M_FLOW_COL, columna destino de M_DISCFLOW)
+COLUMNAS_POR_LEG = {
+    '1': ('der_intereses', 'der_vp'),
+    '2': ('obl_intereses', 'obl_vp'),
+}
+
+# Función para reorganizar las estimaciones en columnas por leg
+def pivotar_legs(df_dat):
+    claves = ['M_CONTRACT', 'M_DATE']
+    df_legs = df_dat.assign(
+        M_FLOW_COL=df_dat['M_FLOW_COL'].astype(float).abs(),
+        M_DISCFLOW=df_dat['M_DISCFLOW'].astype(float).abs(),
+        M_PRESENTE=True,
+    )
+    df_legs = df_legs[
+        df_legs['M_LEG'].isin(list(COLUMNAS_POR_LEG))
+        & df_legs['M_CONTRACT'].notna()
+        & df_legs['M_DATE'].notna()
+    ]
+    # Si se repite (contrato, fecha, leg) prevalece la última fila del .dat
+    df_legs = df_legs.drop_duplicates(claves + ['M_LEG'], keep='last')
+    return df_legs.pivot(index=claves, columns='M_LEG', values=['M_FLOW_COL', 'M_DISCFLOW', 'M_PRESENTE'])
+
+# Función para aplicar las columnas por leg sobre el CSV en un solo cruce
+def aplicar_legs(df_csv, pivote):
+    if pivote.empty:
+        return df_csv
+
+    claves_csv = pd.MultiIndex.from_arrays([df_csv['nro_papeleta'], df_csv['fecha_cobro']])
+    posiciones = pivote.index.get_indexer(claves_csv)
+    coincide = posiciones >= 0
+
+    for leg, (col_flow, col_disc) in COLUMNAS_POR_LEG.items():
+        if ('M_PRESENTE', leg) not in pivote.columns:
+            continue
+        aplica = coincide & pivote[('M_PRESENTE', leg)].notna().to_numpy()[posiciones]
+        for col_destino, col_origen in ((col_flow, 'M_FLOW_COL'), (col_disc, 'M_DISCFLOW')):
+            nuevos = pd.Series(pivote[(col_origen, leg)].to_numpy()[posiciones], index=df_csv.index)
+            # La columna mezcla el texto original con los importes nuevos
+            df_csv[col_destino] = df_csv[col_destino].astype(object).mask(aplica, nuevos)
+
+    return df_csv
 
 # Función principal para procesar cada par de archivos
 def procesar_archivos(ruta_data, ruta_procesados):
-    pares = emparejar_archivos(ruta_data)
+    pares, sin_pareja = emparejar_archivos(ruta_data)
+    for archivo in sin_pareja:
+        logging.warning(f"Archivo sin pareja ({archivo['motivo']}): {archivo['archivo']}")
+
     if not pares:
         logging.info("No se encontraron archivos compatibles para procesar.")
         return
@@ -41,31 +127,18 @@ def procesar_archivos(ruta_data, ruta_procesados):
         ruta_csv = os.path.join(ruta_data, archivo_csv)
         ruta_dat = os.path.join(ruta_data, archivo_dat)
 
-        df_csv = pd.read_csv(ruta_csv, delimiter=';', dtype=str)
-        df_dat = pd.read_csv(ruta_dat, delimiter=';', dtype=str)
-
-        df_dat['M_DATE'] = pd.to_datetime(df_dat['M_DATE'], format='%d/%m/%Y').dt.strftime('%d/%m/%Y')
-
-        for _, fila_dat in df_dat.iterrows():
-            m_contract = fila_dat['M_CONTRACT']
-            m_date = fila_dat['M_DATE']
-            m_leg = fila_dat['M_LEG']
-            m_flow_col = abs(float(fila_dat['M_FLOW_COL']))
-            m_discflow = abs(float(fila_dat['M_DISCFLOW']))
+        df_csv = leer_archivo(ruta_csv, ESQUEMA_CSV)
+        df_dat = leer_archivo(ruta_dat, ESQUEMA_DAT, solo_declaradas=True)
 
-            condicion = (df_csv['nro_papeleta'] == m_contract) & (df_csv['fecha_cobro'] == m_date)
+        # Normaliza M_DATE a FORMATO_FECHA; una fecha inválida detiene el proceso
+        df_dat['M_DATE'] = convertir_fechas(df_dat['M_DATE'], FORMATO_FECHA,
+                                            formato_salida=FORMATO_FECHA, errores='raise')
 
-            if condicion.any():
-                if m_leg == '1':
-                    df_csv.loc[condicion, 'der_intereses'] = m_flow_col
-                    df_csv.loc[condicion, 'der_vp'] = m_discflow
-                elif m_leg == '2':
-                    df_csv.loc[condicion, 'obl_intereses'] = m_flow_col
-                    df_csv.loc[condicion, 'obl_vp'] = m_discflow
+        df_csv = aplicar_legs(df_csv, pivotar_legs(df_dat))
 
         os.makedirs(ruta_procesados, exist_ok=True)
-        ruta_salida = os.path.join(ruta_procesados, archivo_csv)
-        df_csv.to_csv(ruta_salida, index=False, sep=';')
+        ruta_salida = os.path.join(ruta_procesados, nombre_salida(archivo_csv))
+        guardar_csv(df_csv, ruta_salida)
         logging.info(f"Archivo procesado guardado en: {ruta_salida}")
 
 # Ejecución de ejemplo
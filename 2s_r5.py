@@ -1,8 +1,11 @@
+import numpy as np
 import pandas as pd
 import logging
 from pathlib import Path
 from datetime import datetime
-import os
+from typing import Optional
+
+from comun import leer_archivo, convertir_fechas, guardar_csv, nombre_salida
 
 # Configuración de logging
 logging.basicConfig(
@@ -20,58 +23,92 @@ def extraer_fecha(nombre_archivo: str, tipo: str) -> datetime:
     else:
         raise ValueError("Tipo de archivo no reconocido para extraer fecha")
 
-def cargar_archivos(ruta_csv: Path, ruta_dat: Path) -> tuple[pd.DataFrame, pd.DataFrame]:
+# Esquemas declarados: columna usada -> dtype. El .csv se reescribe completo, así que
+# sus demás columnas se leen como texto; del .dat solo se leen las declaradas.
+# M_DISCFLOW y M_FLOW_COL se leen como texto para poder reportar los no numéricos.
+ESQUEMA_CSV = {
+    'cod_emp': 'str', 'fecha_cobro': 'str',
+    'der_intereses': 'float64', 'obl_intereses': 'float64', 'der_vp': 'float64', 'obl_vp': 'float64',
+}
+ESQUEMA_DAT = {'M_CONTRACT_': 'str', 'M_DATE': 'str', 'M_DISCFLOW': 'str', 'M_FLOW_COL': 'str'}
+
+# Formato de las columnas de fecha de cada archivo
+FORMATOS_FECHA = {'fecha_cobro': '%d/%m/%Y', 'M_DATE': '%d/%m/%Y'}
+
+def cargar_archivos(ruta_csv: Path, ruta_dat: Path, motor: Optional[str] = None) -> tuple[pd.DataFrame, pd.DataFrame]:
     """Carga los archivos .csv y .dat en DataFrames de pandas."""
-    df_csv = pd.read_csv(ruta_csv, sep=';', dtype=str)
-    df_dat = pd.read_csv(ruta_dat, sep=';', dtype=str)
+    df_csv = leer_archivo(ruta_csv, ESQUEMA_CSV, motor=motor)
+    df_dat = leer_archivo(ruta_dat, ESQUEMA_DAT, solo_declaradas=True, motor=motor)
     logging.info("Archivos cargados correctamente.")
     return df_csv, df_dat
 
-def convertir_fechas(df: pd.DataFrame, col: str, formato: str) -> pd.DataFrame:
-    """Convierte columna de fecha a datetime."""
-    df[col] = pd.to_datetime(df[col], format=formato, errors='coerce')
-    return df
+# Columna del .dat -> (destino si es positivo, destino si es negativo)
+REGLAS_SIGNO = (
+    ('M_DISCFLOW', 'der_intereses', 'obl_intereses'),
+    ('M_FLOW_COL', 'der_vp', 'obl_vp'),
+)
+
+# Máximo de filas detalladas en el aviso de valores no numéricos
+MAX_FILAS_REPORTE = 20
+
+def reportar_no_numericos(df_invalidas: pd.DataFrame) -> None:
+    """Emite un único aviso con las filas del .dat que tienen valores no numéricos."""
+    detalle = "; ".join(
+        f"fila {idx}: M_CONTRACT_={fila['M_CONTRACT_']}, "
+        f"M_DISCFLOW={fila['M_DISCFLOW']}, M_FLOW_COL={fila['M_FLOW_COL']}"
+        for idx, fila in df_invalidas.head(MAX_FILAS_REPORTE).iterrows()
+    )
+    if len(df_invalidas) > MAX_FILAS_REPORTE:
+        detalle += f"; ... y {len(df_invalidas) - MAX_FILAS_REPORTE} más"
+    logging.warning(f"Valores no numéricos en {len(df_invalidas)} filas, se omiten: {detalle}")
 
 def procesar(df_csv: pd.DataFrame, df_dat: pd.DataFrame) -> pd.DataFrame:
     """Procesa y actualiza los valores según las reglas del negocio."""
-    df_csv = convertir_fechas(df_csv, 'fecha_cobro', '%d/%m/%Y')
-    df_dat = convertir_fechas(df_dat, 'M_DATE', '%d/%m/%Y')
+    df_csv['fecha_cobro'] = convertir_fechas(df_csv['fecha_cobro'], FORMATOS_FECHA['fecha_cobro'])
+    df_dat['M_DATE'] = convertir_fechas(df_dat['M_DATE'], FORMATOS_FECHA['M_DATE'])
 
     df_csv[['der_intereses', 'obl_intereses', 'der_vp', 'obl_vp']] = df_csv[
         ['der_intereses', 'obl_intereses', 'der_vp', 'obl_vp']
     ].fillna(0).astype(float)
 
-    for _, row in df_dat.iterrows():
-        mask = (
-            (df_csv['cod_emp'] == row['M_CONTRACT_']) &
-            (df_csv['fecha_cobro'] == row['M_DATE'])
-        )
-        if mask.any():
-            try:
-                discflow = float(row['M_DISCFLOW'])
-                flow_col = float(row['M_FLOW_COL'])
-            except ValueError:
-                logging.warning(f"Valores no numéricos en fila: {row}")
+    # Solo cuentan las filas del .dat que cruzan con alguna fila del CSV
+    claves = ['M_CONTRACT_', 'M_DATE']
+    claves_csv = pd.MultiIndex.from_arrays([df_csv['cod_emp'], df_csv['fecha_cobro']])
+    df_dat = df_dat[df_dat['M_CONTRACT_'].notna() & df_dat['M_DATE'].notna()]
+    df_dat = df_dat[pd.MultiIndex.from_frame(df_dat[claves]).isin(claves_csv)]
+
+    # Convertir una sola vez; las filas con texto no numérico se reportan y se omiten
+    columnas_valor = [col for col, _, _ in REGLAS_SIGNO]
+    # astype: sobre un frame vacío to_numeric conserva el dtype de texto de pyarrow
+    valores = pd.DataFrame(
+        {col: pd.to_numeric(df_dat[col], errors='coerce').astype('float64') for col in columnas_valor},
+        index=df_dat.index,
+    )
+    invalidas = (valores.isna() & df_dat[columnas_valor].notna()).any(axis=1)
+    if invalidas.any():
+        reportar_no_numericos(df_dat[invalidas])
+    df_dat = df_dat[~invalidas].assign(**valores[~invalidas])
+
+    for col_origen, col_positivo, col_negativo in REGLAS_SIGNO:
+        valores = df_dat[col_origen]
+        for col_destino, condicion in ((col_positivo, valores > 0), (col_negativo, valores < 0)):
+            # Si varias filas cruzan con la misma clave prevalece la última
+            ultimos = df_dat[condicion].groupby(claves, sort=False)[col_origen].last().abs()
+            if ultimos.empty:
                 continue
-
-            if discflow > 0:
-                df_csv.loc[mask, 'der_intereses'] = discflow
-            elif discflow < 0:
-                df_csv.loc[mask, 'obl_intereses'] = abs(discflow)
-
-            if flow_col > 0:
-                df_csv.loc[mask, 'der_vp'] = flow_col
-            elif flow_col < 0:
-                df_csv.loc[mask, 'obl_vp'] = abs(flow_col)
+            posiciones = ultimos.index.get_indexer(claves_csv)
+            df_csv[col_destino] = np.where(
+                posiciones >= 0, ultimos.to_numpy()[posiciones], df_csv[col_destino]
+            )
 
     logging.info("Archivo procesado correctamente.")
     return df_csv
 
 def guardar_archivo(df: pd.DataFrame, nombre: str, carpeta: Path):
-    """Guarda el DataFrame modificado en la carpeta destino."""
+    """Guarda el DataFrame modificado en la carpeta destino de forma atómica (ver comun.guardar_csv)."""
     carpeta.mkdir(exist_ok=True)
-    ruta_salida = carpeta / nombre
-    df.to_csv(ruta_salida, sep=';', index=False)
+    ruta_salida = carpeta / nombre_salida(nombre)
+    guardar_csv(df, ruta_salida)
     logging.info(f"Archivo guardado en: {ruta_salida}")
 
 def main():
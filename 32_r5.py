@@ -7,26 +7,226 @@ Este script procesa archivos relacionados con operaciones swap:
 - COL_ESTIM_FLOWS_*.dat  
 - Informe_R5_GBO_*.csv
 
+Cualquiera de ellos puede llegar comprimido (.gz o .zst); se descomprime al leerlo.
+
 Autor: Expert Python Developer
 Versión: 1.0
 Python: 3.13+
 """
 
+import io
 import os
+import re
+import gzip
+import glob
+import json
+import codecs
+import ctypes
+import ctypes.util
+import hashlib
+import time
+import select
 import logging
+import argparse
+import tracemalloc
 import pandas as pd
-from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Tuple, Optional, Dict, Any
+from typing import Tuple, Optional, Dict, Any, List, Callable, Iterator, BinaryIO
 import sys
 
+from comun import convertir_fechas, escritura_atomica, firma_archivo, cargar_manifiesto, guardar_manifiesto
+
+try:
+    import resource
+except ImportError:  # no disponible en Windows: sin pico de RSS de respaldo
+    resource = None
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv, feather
+except ImportError:  # pyarrow es opcional: sin él no hay caché columnar ni lector pyarrow
+    pa = pa_csv = feather = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard es opcional: sin él no se escriben ni leen archivos .zst
+    zstandard = None
+
+
+# Fecha procesada cuando no se indica ninguna por línea de comandos
+FECHA_POR_DEFECTO = "20250603"
+
+# Bytes por MB en los registros de memoria
+MB = 1024 * 1024
+
+
+def _memoria_proceso() -> Dict[str, Optional[float]]:
+    """
+    Lee el RSS actual y el pico de RSS del proceso en MB.
+    
+    En Linux se usan VmRSS y VmHWM de /proc/self/status; en otros sistemas solo se
+    conoce el pico de toda la vida del proceso (ru_maxrss).
+    """
+    try:
+        with open('/proc/self/status', encoding='ascii') as estado:
+            campos = dict(linea.split(':', 1) for linea in estado if ':' in linea)
+        return {
+            'rss_mb': round(int(campos['VmRSS'].split()[0]) * 1024 / MB, 3),
+            'pico_rss_mb': round(int(campos['VmHWM'].split()[0]) * 1024 / MB, 3),
+        }
+    except (OSError, KeyError, ValueError):
+        if resource is None:
+            return {'rss_mb': None, 'pico_rss_mb': None}
+        # ru_maxrss está en KB salvo en macOS, donde está en bytes
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        pico = pico if sys.platform == 'darwin' else pico * 1024
+        return {'rss_mb': None, 'pico_rss_mb': round(pico / MB, 3)}
+
+
+def _reiniciar_pico_rss() -> bool:
+    """Reinicia el pico de RSS (VmHWM) del proceso; solo es posible en Linux 4.0 o posterior."""
+    try:
+        with open('/proc/self/clear_refs', 'w', encoding='ascii') as archivo:
+            archivo.write('5')
+        return True
+    except OSError:
+        return False
+
+
+class _Inotify:
+    """
+    Avisos de inotify sobre los archivos que se crean, terminan de escribirse, se
+    mueven o se borran en un directorio (solo Linux, vía libc con ctypes).
+    """
+    
+    # IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    EVENTOS = 0x008 | 0x040 | 0x080 | 0x100 | 0x200
+    
+    def __init__(self, directorio: Path):
+        """
+        Raises:
+            OSError: Si inotify no está disponible en el sistema
+        """
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            iniciar, agregar = libc.inotify_init1, libc.inotify_add_watch
+        except (OSError, AttributeError) as e:
+            raise OSError(f"inotify no disponible: {e}") from e
+        
+        self.fd = iniciar(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falló")
+        if agregar(self.fd, os.fsencode(directorio), self.EVENTOS) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch falló sobre {directorio}")
+    
+    def esperar(self, segundos: Optional[float]) -> bool:
+        """Espera hasta que haya eventos o pasen los segundos indicados; devuelve si hubo eventos."""
+        if not select.select([self.fd], [], [], segundos)[0]:
+            return False
+        # Solo importa que hubo cambios: cada ciclo vuelve a revisar el directorio completo
+        try:
+            while os.read(self.fd, 64 * 1024):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+    
+    def close(self) -> None:
+        os.close(self.fd)
+
 
 class SwapProcessor:
     """
     Procesador principal para archivos swap con validación y transformación de datos.
     """
     
-    def __init__(self, data_dir: str = "data", output_dir: str = "procesados", log_dir: str = "logs"):
+    # Columna de COL_ESTIM_FLOWS -> (destino si es positivo, destino si es negativo)
+    REGLAS_ESTIMACION = (
+        ('M_DISCFLOW', 'der_intereses', 'obl_intereses'),
+        ('M_FLOW_COL', 'der_vp', 'obl_vp'),
+    )
+    
+    # Encodings a probar, en orden, al leer los archivos de entrada
+    ENCODINGS = ('utf-8', 'latin-1', 'cp1252')
+    
+    # Bytes iniciales de cada archivo usados para detectar su encoding
+    MUESTRA_ENCODING = 1024 * 1024
+    
+    # Versión registrada en el manifiesto; cambiarla invalida las salidas ya generadas
+    VERSION = "1.0"
+    
+    # Manifiesto de salidas generadas, dentro de output_dir
+    ARCHIVO_MANIFIESTO = "manifiesto_swaps.json"
+    
+    # Esquema declarado por familia: dtype de cada columna usada, formato de sus fechas
+    # (None si se infiere al convertir) y si el resto de columnas se descarta al leer.
+    # Solo COL_ESTIM_FLOWS se lee con usecols: flujos e informe se reescriben completos
+    ESQUEMAS = {
+        'flujos': {
+            'dtypes': {'cod_emp': 'str', 'fecha_cobro': 'str', 'der_intereses': 'float64',
+                       'obl_intereses': 'float64', 'der_vp': 'float64', 'obl_vp': 'float64'},
+            'fechas': {'fecha_cobro': None},
+            'solo_declaradas': False,
+        },
+        'estimaciones': {
+            'dtypes': {'M_CONTRACT_': 'str', 'M_DATE': 'str', 'M_DISCFLOW': 'float64', 'M_FLOW_COL': 'float64'},
+            'fechas': {'M_DATE': '%d/%m/%Y'},
+            'solo_declaradas': True,
+        },
+        'informe': {
+            'dtypes': {'codigo_operacion': 'str', 'cupon': 'float64', 'cupon_1': 'float64'},
+            'fechas': {},
+            'solo_declaradas': False,
+        },
+    }
+    
+    # Perfiles de memoria por etapa: 'rss' es barato; 'tracemalloc' además detalla las
+    # asignaciones, pero multiplica el tiempo de las etapas que crean muchos objetos
+    PERFILES_MEMORIA = ('rss', 'tracemalloc')
+    
+    # Asignaciones de tracemalloc detalladas por etapa
+    ASIGNACIONES_POR_ETAPA = 10
+    
+    # Marcos de pila guardados por tracemalloc, para llegar desde pandas a la línea de este script
+    MARCOS_TRACEMALLOC = 15
+    
+    # Motores disponibles para parsear los archivos completos
+    MOTORES_LECTURA = ('pandas', 'pyarrow')
+    
+    # Compresiones admitidas para las salidas -> extensión agregada a su nombre
+    COMPRESIONES_SALIDA = {'gzip': '.gz', 'zstd': '.zst'}
+    
+    # Modo vigilancia: segundos que el tamaño y el mtime de los archivos de una fecha deben
+    # mantenerse sin cambios para darlos por completos, y espera máxima entre revisiones
+    # del directorio (con inotify solo se espera tanto si no llega ningún evento)
+    ESPERA_ESTABILIDAD = 2.0
+    INTERVALO_VIGILANCIA = 1.0
+    INTERVALO_VIGILANCIA_INOTIFY = 60.0
+    
+    # Subdirectorio, junto a cada entrada, con la copia columnar (Arrow IPC) ya parseada
+    DIRECTORIO_CACHE = ".cache"
+    
+    # Extensión de una entrada comprimida -> compresión con la que se descomprime al leerla
+    COMPRESIONES_ENTRADA = {'.gz': 'gzip', '.zst': 'zstd'}
+    
+    # Familia de archivo -> (nombre esperado con la fecha capturada, formato de esa fecha).
+    # Cada nombre se acepta también comprimido, con una extensión de COMPRESIONES_ENTRADA
+    FAMILIAS_ARCHIVO = {
+        'flujos': (re.compile(r'^flujos_swap_gbo_(\d{8})\.csv(?:\.gz|\.zst)?$'), '%Y%m%d'),
+        'estimaciones': (re.compile(r'^COL_ESTIM_FLOWS_(\d{8})\.dat(?:\.gz|\.zst)?$'), '%d%m%Y'),
+        'informe': (re.compile(r'^Informe_R5_GBO_(\d{6})\.csv(?:\.gz|\.zst)?$'), '%y%m%d'),
+    }
+    
+    def __init__(self, data_dir: str = "data", output_dir: str = "procesados", log_dir: str = "logs",
+                 tamano_bloque: Optional[int] = None, incremental: bool = True, usar_cache: bool = False,
+                 motor_lectura: str = 'pandas',
+                 callback_ejecucion: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 perfil_memoria: Optional[str] = None, compresion_salida: Optional[str] = None):
         """
         Inicializa el procesador de swaps.
         
@@ -34,10 +234,49 @@ class SwapProcessor:
             data_dir: Directorio donde se encuentran los archivos de entrada
             output_dir: Directorio donde se guardarán los archivos procesados
             log_dir: Directorio para archivos de log
+            tamano_bloque: Si se indica, flujos_swap_gbo se procesa en bloques de este
+                número de filas en lugar de cargarse completo en memoria
+            incremental: Si es True, se omiten las fechas cuyas salidas están al día
+                según el manifiesto de output_dir
+            usar_cache: Si es True, cada entrada parseada se guarda en formato Arrow IPC
+                y las cargas siguientes la leen mapeada en memoria (requiere pyarrow)
+            motor_lectura: 'pandas' (lector C de pandas) o 'pyarrow' (lector multihilo de
+                pyarrow, con columnas de texto respaldadas por Arrow)
+            callback_ejecucion: Función que recibe el registro de cada ejecución de
+                procesar_fecha (ver _nuevo_registro) al terminar, con éxito o no
+            perfil_memoria: 'rss' para registrar el RSS y su pico en cada etapa, o
+                'tracemalloc' para agregar además sus mayores asignaciones (ver PERFILES_MEMORIA)
+            compresion_salida: 'gzip' o 'zstd' para comprimir los archivos procesados
+                (zstd requiere zstandard); None los escribe sin comprimir
         """
+        if motor_lectura not in self.MOTORES_LECTURA:
+            raise ValueError(f"Motor de lectura desconocido: {motor_lectura}. Opciones: {self.MOTORES_LECTURA}")
+        if perfil_memoria not in (None,) + self.PERFILES_MEMORIA:
+            raise ValueError(f"Perfil de memoria desconocido: {perfil_memoria}. Opciones: {self.PERFILES_MEMORIA}")
+        if compresion_salida not in (None,) + tuple(self.COMPRESIONES_SALIDA):
+            raise ValueError(f"Compresión de salida desconocida: {compresion_salida}. "
+                             f"Opciones: {tuple(self.COMPRESIONES_SALIDA)}")
+        
         self.data_dir = Path(data_dir)
         self.output_dir = Path(output_dir)
         self.log_dir = Path(log_dir)
+        self.tamano_bloque = tamano_bloque
+        self.incremental = incremental
+        self.usar_cache = usar_cache
+        self.motor_lectura = motor_lectura
+        self.callback_ejecucion = callback_ejecucion
+        self.perfil_memoria = perfil_memoria
+        self.compresion_salida = compresion_salida
+        
+        # Registro de la última ejecución de procesar_fecha
+        self.ultima_ejecucion: Optional[Dict[str, Any]] = None
+        
+        # Índice del directorio de entrada: (familia, fecha YYYYMMDD) -> rutas
+        self._indice_archivos: Dict[Tuple[str, str], List[Path]] = {}
+        self._mtime_indice: Optional[int] = None
+        
+        # Formato detectado por familia y columna de fecha, reutilizado entre bloques y fechas
+        self._formatos_fecha: Dict[str, Dict[str, str]] = {}
         
         # Crear directorios si no existen
         self._create_directories()
@@ -47,6 +286,81 @@ class SwapProcessor:
         
         self.logger = logging.getLogger(__name__)
         self.logger.info("SwapProcessor inicializado correctamente")
+        
+        if self.usar_cache and feather is None:
+            self.logger.warning("pyarrow no está instalado, se desactiva la caché columnar")
+            self.usar_cache = False
+        
+        if self.motor_lectura == 'pyarrow' and pa_csv is None:
+            self.logger.warning("pyarrow no está instalado, se usa el lector de pandas")
+            self.motor_lectura = 'pandas'
+        
+        if self.compresion_salida == 'zstd' and zstandard is None:
+            self.logger.warning("zstandard no está instalado, las salidas se comprimen con gzip")
+            self.compresion_salida = 'gzip'
+    
+    def _configuracion(self) -> Dict[str, Any]:
+        """Devuelve los argumentos necesarios para recrear el procesador en otro proceso."""
+        return {
+            'data_dir': str(self.data_dir),
+            'output_dir': str(self.output_dir),
+            'log_dir': str(self.log_dir),
+            'tamano_bloque': self.tamano_bloque,
+            'incremental': self.incremental,
+            'usar_cache': self.usar_cache,
+            'motor_lectura': self.motor_lectura,
+            'perfil_memoria': self.perfil_memoria,
+            'compresion_salida': self.compresion_salida,
+        }
+    
+    def _salida_al_dia(self, manifiesto: Dict[str, Any], salida: Path, entradas: List[Path]) -> bool:
+        """
+        Indica si una salida ya fue generada con la versión actual a partir de las mismas entradas.
+        
+        Si tamaño y mtime coinciden no se relee el archivo; si solo cambió el mtime se
+        compara el hash del contenido.
+        """
+        registro = manifiesto.get(salida.name)
+        if not registro or registro.get('version') != self.VERSION or not salida.exists():
+            return False
+        
+        firmas = registro.get('entradas', {})
+        if set(firmas) != {str(ruta) for ruta in entradas}:
+            return False
+        
+        for ruta in entradas:
+            firma = firmas[str(ruta)]
+            estado = ruta.stat()
+            if estado.st_size != firma['tamano']:
+                return False
+            if estado.st_mtime_ns != firma['mtime_ns'] and firma_archivo(ruta)['sha256'] != firma['sha256']:
+                return False
+        
+        return True
+    
+    def _registrar_salidas(self, salidas: Dict[Path, List[Path]], firmas: Dict[Path, Dict[str, Any]]) -> None:
+        """
+        Registra en el manifiesto las salidas generadas y la firma de sus entradas.
+        
+        Las firmas deben tomarse antes de leer las entradas: si una entrada cambia durante
+        el procesamiento, su firma no coincide con el contenido actual y la salida se
+        regenera en la próxima ejecución en lugar de darse por al día.
+        
+        El manifiesto se relee y se reemplaza de forma atómica justo antes de escribir
+        para no pisar lo registrado por otros procesos del lote; si aun así se pierde un
+        registro, esa salida simplemente se regenera en la próxima ejecución.
+        """
+        registros = {}
+        for salida, entradas in salidas.items():
+            registros[salida.name] = {
+                'version': self.VERSION,
+                'entradas': {str(ruta): firmas[ruta] for ruta in entradas},
+            }
+        
+        ruta = self.output_dir / self.ARCHIVO_MANIFIESTO
+        manifiesto = cargar_manifiesto(ruta)
+        manifiesto.update(registros)
+        guardar_manifiesto(ruta, manifiesto)
     
     def _create_directories(self) -> None:
         """Crea los directorios necesarios si no existen."""
@@ -109,15 +423,15 @@ class SwapProcessor:
         
         # Archivo flujos_swap_gbo (requerido)
         patron_flujos = f"flujos_swap_gbo_{formato_flujos}.csv"
-        archivos['flujos'] = self._buscar_archivo(patron_flujos)
+        archivos['flujos'] = self._buscar_archivo('flujos', fecha_referencia, patron_flujos)
         
         # Archivo COL_ESTIM_FLOWS (requerido)
         patron_estim = f"COL_ESTIM_FLOWS_{formato_estim}.dat"
-        archivos['estimaciones'] = self._buscar_archivo(patron_estim)
+        archivos['estimaciones'] = self._buscar_archivo('estimaciones', fecha_referencia, patron_estim)
         
         # Archivo Informe_R5_GBO (opcional)
         patron_informe = f"Informe_R5_GBO_{formato_informe}.csv"
-        archivos['informe'] = self._buscar_archivo(patron_informe, requerido=False)
+        archivos['informe'] = self._buscar_archivo('informe', fecha_referencia, patron_informe, requerido=False)
         
         self.logger.info(f"Archivos encontrados para fecha {fecha_referencia}:")
         for tipo, ruta in archivos.items():
@@ -128,12 +442,15 @@ class SwapProcessor:
         
         return archivos
     
-    def _buscar_archivo(self, patron: str, requerido: bool = True) -> Optional[Path]:
+    def _buscar_archivo(self, familia: str, fecha_referencia: str, patron: str,
+                        requerido: bool = True) -> Optional[Path]:
         """
-        Busca un archivo con el patrón especificado.
+        Busca en el índice del directorio el archivo de una familia para una fecha.
         
         Args:
-            patron: Patrón del nombre del archivo
+            familia: Familia del archivo ('flujos', 'estimaciones' o 'informe')
+            fecha_referencia: Fecha en formato YYYYMMDD
+            patron: Nombre esperado del archivo sin comprimir, usado en los mensajes
             requerido: Si el archivo es requerido
             
         Returns:
@@ -142,11 +459,11 @@ class SwapProcessor:
         Raises:
             FileNotFoundError: Si el archivo requerido no existe
         """
-        archivos_encontrados = list(self.data_dir.glob(patron))
+        archivos_encontrados = self._obtener_indice_archivos().get((familia, fecha_referencia), [])
         
         if not archivos_encontrados:
             if requerido:
-                raise FileNotFoundError(f"Archivo requerido no encontrado: {patron}")
+                raise FileNotFoundError(f"Archivo requerido no encontrado: {patron} (ni comprimido .gz/.zst)")
             return None
         
         if len(archivos_encontrados) > 1:
@@ -154,10 +471,60 @@ class SwapProcessor:
         
         return archivos_encontrados[0]
     
+    def _obtener_indice_archivos(self) -> Dict[Tuple[str, str], List[Path]]:
+        """
+        Devuelve el índice del directorio de entrada, reconstruyéndolo solo si cambió.
+        
+        El índice se recorre una única vez con os.scandir y se reutiliza entre fechas
+        mientras el mtime del directorio no cambie.
+        
+        Returns:
+            Diccionario (familia, fecha YYYYMMDD) -> rutas encontradas
+        """
+        mtime = self.data_dir.stat().st_mtime_ns
+        if mtime == self._mtime_indice:
+            return self._indice_archivos
+        
+        indice: Dict[Tuple[str, str], List[Path]] = {}
+        with os.scandir(self.data_dir) as entradas:
+            for entrada in entradas:
+                clave = self._clasificar_archivo(entrada.name)
+                if clave and entrada.is_file():
+                    indice.setdefault(clave, []).append(Path(entrada.path))
+        
+        for rutas in indice.values():
+            rutas.sort()
+        
+        self._indice_archivos = indice
+        self._mtime_indice = mtime
+        total = sum(len(rutas) for rutas in indice.values())
+        self.logger.info(f"Índice de {self.data_dir} actualizado: {total} archivos reconocidos")
+        return indice
+    
+    def _clasificar_archivo(self, nombre: str) -> Optional[Tuple[str, str]]:
+        """
+        Identifica la familia y la fecha (YYYYMMDD) de un archivo por su nombre.
+        
+        Returns:
+            Tupla (familia, fecha) o None si el nombre no corresponde a ninguna familia
+        """
+        for familia, (expresion, formato_fecha) in self.FAMILIAS_ARCHIVO.items():
+            coincidencia = expresion.match(nombre)
+            if coincidencia:
+                try:
+                    fecha = datetime.strptime(coincidencia.group(1), formato_fecha)
+                except ValueError:
+                    return None
+                return familia, fecha.strftime("%Y%m%d")
+        return None
+    
     def cargar_archivo(self, ruta: Path, separador: str = ';') -> pd.DataFrame:
         """
         Carga un archivo CSV/DAT usando pandas.
         
+        Los archivos .gz y .zst se descomprimen mientras se parsean, sin copia
+        intermedia en disco.
+        
         Args:
             ruta: Ruta del archivo
             separador: Separador a usar
@@ -171,28 +538,267 @@ class SwapProcessor:
         try:
             self.logger.info(f"Cargando archivo: {ruta}")
             
-            # Detectar encoding
-            encodings = ['utf-8', 'latin-1', 'cp1252']
+            esquema = self._esquema_archivo(ruta)
+            opciones = self._opciones_lectura(separador, esquema)
+            if self.usar_cache:
+                # La clave sale del tamaño y mtime previos al parseo: si la entrada cambia
+                # mientras se lee, lo leído no queda guardado bajo la clave del contenido nuevo
+                ruta_cache = self._ruta_cache(ruta, opciones)
+                df = self._leer_cache(ruta, ruta_cache, opciones)
+                if df is not None:
+                    return df
+            
+            # Detectar encoding: normalmente el primer candidato es el correcto y
+            # el archivo se parsea una sola vez
             df = None
+            inicio = time.perf_counter()
             
-            for encoding in encodings:
+            for encoding in self._encodings_candidatos(ruta):
                 try:
-                    df = pd.read_csv(ruta, sep=separador, encoding=encoding)
+                    df = self._leer_csv(ruta, separador, encoding, esquema)
                     self.logger.info(f"Archivo cargado con encoding: {encoding}")
                     break
                 except UnicodeDecodeError:
+                    self.logger.warning(f"Encoding {encoding} no válido para {ruta}, reintentando")
                     continue
             
             if df is None:
                 raise Exception(f"No se pudo cargar el archivo con ningún encoding: {ruta}")
             
-            self.logger.info(f"Archivo cargado exitosamente: {len(df)} filas, {len(df.columns)} columnas")
+            self.logger.info(
+                f"Archivo cargado exitosamente: {len(df)} filas, {len(df.columns)} columnas "
+                f"(motor {self.motor_lectura}, {time.perf_counter() - inicio:.3f}s)"
+            )
+            
+            if self.usar_cache:
+                self._escribir_cache(ruta, ruta_cache, df)
             return df
             
         except Exception as e:
             self.logger.error(f"Error al cargar archivo {ruta}: {str(e)}")
             raise
     
+    def _esquema_archivo(self, ruta: Path) -> Optional[Dict[str, Any]]:
+        """Devuelve el esquema declarado de la familia del archivo, o None si no pertenece a ninguna."""
+        clave = self._clasificar_archivo(ruta.name)
+        return self.ESQUEMAS[clave[0]] if clave else None
+    
+    def _argumentos_esquema(self, esquema: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Traduce un esquema declarado a los argumentos dtype y usecols de pandas.read_csv."""
+        if esquema is None:
+            return {}
+        argumentos = {'dtype': esquema['dtypes']}
+        if esquema['solo_declaradas']:
+            # Un callable no falla si falta una columna: lo informa luego _validar_columnas
+            argumentos['usecols'] = esquema['dtypes'].__contains__
+        return argumentos
+    
+    def _leer_csv(self, ruta: Path, separador: str, encoding: str,
+                  esquema: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        """
+        Parsea un archivo completo con el motor de lectura configurado.
+        
+        Las columnas declaradas en el esquema se leen con su dtype y, si el esquema
+        lo indica, las no declaradas no llegan a materializarse. Con pyarrow se
+        conservan como texto las fechas y horas ISO, igual que hace pandas, y las
+        columnas vacías quedan como float64 con NaN.
+        
+        Raises:
+            UnicodeDecodeError: Si el contenido no es válido en el encoding indicado
+        """
+        if self.motor_lectura == 'pandas':
+            return pd.read_csv(ruta, sep=separador, encoding=encoding, compression=self._compresion_entrada(ruta),
+                               **self._argumentos_esquema(esquema))
+        
+        # pyarrow descomprime por su cuenta las rutas .gz y .zst mientras lee los bloques
+        opciones_lectura = pa_csv.ReadOptions(encoding=encoding)
+        opciones_parseo = pa_csv.ParseOptions(delimiter=separador)
+        
+        # El primer bloque basta para saber qué columnas convertiría pyarrow a fecha
+        with pa_csv.open_csv(ruta, read_options=opciones_lectura, parse_options=opciones_parseo) as lector:
+            esquema_leido = lector.schema
+        if any(pa.types.is_binary(campo.type) for campo in esquema_leido):
+            raise UnicodeDecodeError(encoding, b'', 0, 0, "texto no decodificable en la primera parte del archivo")
+        
+        dtypes = esquema['dtypes'] if esquema else {}
+        tipos = {campo.name: pa.string() for campo in esquema_leido if pa.types.is_temporal(campo.type)}
+        tipos.update({columna: pa.type_for_alias(dtype) for columna, dtype in dtypes.items()})
+        incluidas = []
+        if esquema and esquema['solo_declaradas']:
+            incluidas = [columna for columna in esquema_leido.names if columna in dtypes]
+        
+        opciones_conversion = pa_csv.ConvertOptions(
+            column_types=tipos, include_columns=incluidas, strings_can_be_null=True,
+        )
+        try:
+            tabla = pa_csv.read_csv(ruta, read_options=opciones_lectura, parse_options=opciones_parseo,
+                                    convert_options=opciones_conversion)
+        except pa.ArrowInvalid as e:
+            if 'UTF8' in str(e):
+                raise UnicodeDecodeError(encoding, b'', 0, 0, str(e)) from e
+            raise
+        
+        for posicion, campo in enumerate(tabla.schema):
+            if pa.types.is_null(campo.type):
+                tabla = tabla.set_column(posicion, campo.name, tabla.column(posicion).cast(pa.float64()))
+        
+        return tabla.to_pandas(types_mapper=self._tipos_arrow)
+    
+    def _compresion_entrada(self, ruta: Path) -> Optional[str]:
+        """Devuelve la compresión de un archivo de entrada según su extensión, o None si es plano."""
+        return self.COMPRESIONES_ENTRADA.get(ruta.suffix)
+    
+    def _abrir_entrada(self, ruta: Path) -> BinaryIO:
+        """
+        Abre un archivo de entrada en binario, descomprimiéndolo al vuelo si es .gz o .zst.
+        
+        Raises:
+            ImportError: Si el archivo es .zst y zstandard no está instalado
+        """
+        compresion = self._compresion_entrada(ruta)
+        if compresion == 'gzip':
+            return gzip.open(ruta, 'rb')
+        if compresion == 'zstd':
+            if zstandard is None:
+                raise ImportError(f"zstandard no está instalado, no se puede leer {ruta}")
+            # BufferedReader completa cada read(n) aunque el descompresor entregue menos bytes
+            return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(ruta, 'rb'), closefd=True))
+        return open(ruta, 'rb')
+    
+    @staticmethod
+    def _tipos_arrow(tipo: Any) -> Optional[Any]:
+        """Mapea las columnas de texto de Arrow a StringDtype respaldado por pyarrow."""
+        if tipo == pa.string() or tipo == pa.large_string():
+            return pd.StringDtype('pyarrow')
+        return None
+    
+    def _opciones_lectura(self, separador: str, esquema: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Opciones de parseo que determinan el DataFrame cargado; forman parte de la clave de caché."""
+        return {'separador': separador, 'motor': self.motor_lectura, 'esquema': esquema}
+    
+    def _ruta_cache(self, ruta: Path, opciones: Dict[str, Any]) -> Path:
+        """
+        Calcula la ruta de la caché columnar de un archivo de entrada.
+        
+        El nombre incluye un hash de la ruta, tamaño, mtime, opciones de parseo y VERSION,
+        así que cualquier cambio en la entrada o en la forma de leerla apunta a otra caché.
+        
+        Args:
+            ruta: Ruta del archivo de entrada
+            opciones: Opciones de parseo (ver _opciones_lectura)
+            
+        Returns:
+            Ruta del archivo .arrow correspondiente
+        """
+        estado = ruta.stat()
+        clave = json.dumps({
+            'ruta': str(ruta.resolve()),
+            'tamano': estado.st_size,
+            'mtime_ns': estado.st_mtime_ns,
+            'opciones': opciones,
+            'version': self.VERSION,
+        }, sort_keys=True)
+        digest = hashlib.sha256(clave.encode('utf-8')).hexdigest()[:16]
+        return ruta.parent / self.DIRECTORIO_CACHE / f"{ruta.name}.{digest}.arrow"
+    
+    def _leer_cache(self, ruta: Path, ruta_cache: Path, opciones: Dict[str, Any]) -> Optional[pd.DataFrame]:
+        """Lee la caché columnar vigente de un archivo (ver _ruta_cache), o devuelve None si no existe o es ilegible."""
+        if not ruta_cache.exists():
+            return None
+        
+        try:
+            tabla = feather.read_table(ruta_cache, memory_map=True)
+            df = tabla.to_pandas(
+                ignore_metadata=True,
+                types_mapper=self._tipos_arrow if opciones['motor'] == 'pyarrow' else None,
+            )
+        except Exception as e:
+            self.logger.warning(f"Caché ilegible para {ruta}, se vuelve a parsear: {ruta_cache} ({e})")
+            return None
+        
+        # Arrow devuelve los textos nulos como None; read_csv los deja como NaN. Sin convertir
+        # el dtype: una columna de texto toda nula debe seguir siendo object, como al parsear
+        with pd.option_context('future.no_silent_downcasting', True):
+            for col in df.columns[df.dtypes == object]:
+                df[col] = df[col].fillna(float('nan'))
+        
+        self.logger.info(f"Archivo cargado desde caché: {ruta_cache} ({len(df)} filas, {len(df.columns)} columnas)")
+        return df
+    
+    def _escribir_cache(self, ruta: Path, ruta_cache: Path, df: pd.DataFrame) -> None:
+        """
+        Guarda un DataFrame recién parseado como caché columnar de su archivo de entrada.
+        
+        Se escribe sin compresión para que la lectura pueda mapearse en memoria, y se
+        eliminan las cachés anteriores del mismo archivo. Un fallo solo se registra:
+        la carga ya terminó y la caché es prescindible.
+        
+        Args:
+            ruta: Ruta del archivo de entrada
+            ruta_cache: Ruta de la caché calculada antes de parsear la entrada
+            df: DataFrame parseado
+        """
+        temporal = ruta_cache.with_name(f"{ruta_cache.name}.{os.getpid()}.tmp")
+        try:
+            ruta_cache.parent.mkdir(exist_ok=True)
+            feather.write_feather(df, temporal, compression='uncompressed')
+            os.replace(temporal, ruta_cache)
+        except Exception as e:
+            temporal.unlink(missing_ok=True)
+            self.logger.warning(f"No se pudo guardar la caché de {ruta}: {e}")
+            return
+        
+        for anterior in ruta_cache.parent.glob(f"{glob.escape(ruta.name)}.*.arrow"):
+            if anterior != ruta_cache:
+                anterior.unlink(missing_ok=True)
+        
+        self.logger.info(f"Caché columnar guardada: {ruta_cache}")
+    
+    def _encodings_candidatos(self, ruta: Path) -> List[str]:
+        """
+        Devuelve los encodings a probar para un archivo, el más probable primero.
+        
+        Primero va el primero de ENCODINGS que decodifica una muestra acotada del
+        inicio del archivo y el resto queda como respaldo. La muestra se revisa en
+        cada archivo: latin-1 decodifica cualquier contenido sin fallar, así que
+        reutilizar el encoding de otro archivo de la familia podría leer mal un UTF-8.
+        
+        Args:
+            ruta: Ruta del archivo
+            
+        Returns:
+            Lista de encodings ordenada por preferencia
+        """
+        encoding = self._detectar_encoding(ruta)
+        self.logger.info(f"Encoding detectado para {ruta.name}: {encoding}")
+        return [encoding] + [e for e in self.ENCODINGS if e != encoding]
+    
+    def _detectar_encoding(self, ruta: Path) -> str:
+        """
+        Detecta el encoding de un archivo decodificando sus primeros MUESTRA_ENCODING bytes
+        (ya descomprimidos si el archivo es .gz o .zst).
+        
+        Args:
+            ruta: Ruta del archivo
+            
+        Returns:
+            Primer encoding de ENCODINGS que decodifica la muestra
+        """
+        with self._abrir_entrada(ruta) as archivo:
+            muestra = archivo.read(self.MUESTRA_ENCODING)
+        
+        # Si la muestra corta el archivo, un carácter multibyte puede quedar incompleto al final
+        completo = len(muestra) < self.MUESTRA_ENCODING
+        
+        for encoding in self.ENCODINGS:
+            try:
+                codecs.getincrementaldecoder(encoding)().decode(muestra, final=completo)
+                return encoding
+            except UnicodeDecodeError:
+                continue
+        
+        return self.ENCODINGS[-1]
+    
     def procesar_flujos_swap(self, df_flujos: pd.DataFrame, df_estimaciones: pd.DataFrame) -> pd.DataFrame:
         """
         Procesa y modifica el archivo flujos_swap_gbo basado en estimaciones.
@@ -210,48 +816,171 @@ class SwapProcessor:
         df_resultado = df_flujos.copy()
         
         # Validar columnas requeridas
-        cols_flujos = ['cod_emp', 'fecha_cobro', 'der_intereses', 'obl_intereses', 'der_vp', 'obl_vp']
-        cols_estimaciones = ['M_CONTRACT_', 'M_DATE', 'M_DISCFLOW', 'M_FLOW_COL']
+        self._validar_columnas(df_flujos, list(self.ESQUEMAS['flujos']['dtypes']), "flujos_swap_gbo")
+        self._validar_columnas(df_estimaciones, list(self.ESQUEMAS['estimaciones']['dtypes']), "COL_ESTIM_FLOWS")
         
-        self._validar_columnas(df_flujos, cols_flujos, "flujos_swap_gbo")
-        self._validar_columnas(df_estimaciones, cols_estimaciones, "COL_ESTIM_FLOWS")
+        # Convertir M_DATE y fecha_cobro a datetime para comparación
+        self._convertir_fechas(df_estimaciones, 'estimaciones')
+        self._convertir_fechas(df_resultado, 'flujos')
         
-        # Convertir M_DATE a formato datetime para comparación
-        df_estimaciones['M_DATE'] = pd.to_datetime(df_estimaciones['M_DATE'], format='%d/%m/%Y', errors='coerce')
-        df_resultado['fecha_cobro'] = pd.to_datetime(df_resultado['fecha_cobro'], errors='coerce')
+        conteo, valores = self._indexar_estimaciones(df_estimaciones)
+        modificaciones = self._aplicar_estimaciones(df_resultado, conteo, valores)
         
-        modificaciones = 0
+        self.logger.info(f"Procesamiento completado. Modificaciones realizadas: {modificaciones}")
+        return df_resultado
+    
+    def _convertir_fechas(self, df: pd.DataFrame, familia: str) -> None:
+        """
+        Convierte a datetime las columnas de fecha declaradas para la familia (los inválidos quedan NaT).
         
-        # Procesar cada fila de estimaciones
-        for idx, row_est in df_estimaciones.iterrows():
-            # Buscar coincidencias en flujos
-            mask = (
-                (df_resultado['cod_emp'] == row_est['M_CONTRACT_']) &
-                (df_resultado['fecha_cobro'] == row_est['M_DATE'])
-            )
+        Usa comun.convertir_fechas, que parsea cada valor distinto una sola vez. Las columnas
+        sin formato declarado lo detectan en la primera carga y lo reutilizan en las
+        siguientes (y en cada bloque) mientras siga convirtiendo.
+        """
+        detectados = self._formatos_fecha.setdefault(familia, {})
+        for columna, formato in self.ESQUEMAS[familia]['fechas'].items():
+            df[columna] = convertir_fechas(df[columna], formato, detectados)
+    
+    def _indexar_estimaciones(self, df_estimaciones: pd.DataFrame) -> Tuple[pd.Series, Dict[str, pd.Series]]:
+        """
+        Construye las tablas de búsqueda de COL_ESTIM_FLOWS por (M_CONTRACT_, M_DATE).
+        
+        Args:
+            df_estimaciones: DataFrame de COL_ESTIM_FLOWS con M_DATE ya convertido
+            
+        Returns:
+            Número de estimaciones por clave y, para cada columna destino de flujos,
+            el valor de la última estimación aplicable por clave
+        """
+        # Descartar estimaciones sin clave completa: nunca coinciden con un flujo
+        df_est = df_estimaciones[
+            df_estimaciones['M_CONTRACT_'].notna() & df_estimaciones['M_DATE'].notna()
+        ]
+        claves = ['M_CONTRACT_', 'M_DATE']
+        
+        conteo = df_est.groupby(claves, sort=False).size()
+        
+        # Enrutar valores positivos a der_* y negativos a obl_* (en valor absoluto)
+        valores = {}
+        for col_origen, col_der, col_obl in self.REGLAS_ESTIMACION:
+            serie = df_est[col_origen]
+            for col_destino, condicion in ((col_der, serie > 0), (col_obl, serie < 0)):
+                # La última estimación por clave prevalece, igual que en la escritura fila a fila
+                valores[col_destino] = df_est[condicion].groupby(claves, sort=False)[col_origen].last().abs()
+        
+        return conteo, valores
+    
+    def _aplicar_estimaciones(self, df_resultado: pd.DataFrame, conteo: pd.Series,
+                              valores: Dict[str, pd.Series]) -> int:
+        """
+        Aplica las tablas de búsqueda de estimaciones sobre un DataFrame de flujos.
+        
+        Args:
+            df_resultado: DataFrame de flujos con fecha_cobro ya convertido (se modifica)
+            conteo: Número de estimaciones por clave
+            valores: Último valor aplicable por clave para cada columna destino
+            
+        Returns:
+            Número de modificaciones (una por par estimación/flujo coincidente)
+        """
+        claves_flujos = pd.MultiIndex.from_arrays(
+            [df_resultado['cod_emp'], df_resultado['fecha_cobro']]
+        )
+        
+        posiciones = conteo.index.get_indexer(claves_flujos)
+        modificaciones = int(conteo.to_numpy()[posiciones[posiciones >= 0]].sum())
+        
+        for col_destino, ultimos in valores.items():
+            if ultimos.empty:
+                continue
             
-            indices_coincidentes = df_resultado[mask].index
-            
-            if len(indices_coincidentes) > 0:
-                for idx_flujo in indices_coincidentes:
-                    # Procesar M_DISCFLOW
-                    if pd.notna(row_est['M_DISCFLOW']):
-                        if row_est['M_DISCFLOW'] > 0:
-                            df_resultado.loc[idx_flujo, 'der_intereses'] = row_est['M_DISCFLOW']
-                        elif row_est['M_DISCFLOW'] < 0:
-                            df_resultado.loc[idx_flujo, 'obl_intereses'] = abs(row_est['M_DISCFLOW'])
-                    
-                    # Procesar M_FLOW_COL
-                    if pd.notna(row_est['M_FLOW_COL']):
-                        if row_est['M_FLOW_COL'] > 0:
-                            df_resultado.loc[idx_flujo, 'der_vp'] = row_est['M_FLOW_COL']
-                        elif row_est['M_FLOW_COL'] < 0:
-                            df_resultado.loc[idx_flujo, 'obl_vp'] = abs(row_est['M_FLOW_COL'])
-                    
-                    modificaciones += 1
+            posiciones = ultimos.index.get_indexer(claves_flujos)
+            coincide = posiciones >= 0
+            nuevos = pd.Series(ultimos.to_numpy()[posiciones], index=df_resultado.index)
+            df_resultado[col_destino] = df_resultado[col_destino].mask(coincide, nuevos)
+        
+        return modificaciones
+    
+    def procesar_flujos_swap_por_bloques(self, ruta_flujos: Path, df_estimaciones: pd.DataFrame,
+                                         ruta_salida: Path, separador: str = ';',
+                                         metricas: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        """
+        Procesa flujos_swap_gbo en bloques de filas sin cargar el archivo completo.
+        
+        Solo COL_ESTIM_FLOWS se mantiene en memoria; cada bloque de flujos se modifica
+        y se agrega al archivo de salida, por lo que el consumo de memoria depende de
+        tamano_bloque y no del tamaño del archivo.
+        
+        Args:
+            ruta_flujos: Ruta del archivo flujos_swap_gbo
+            df_estimaciones: DataFrame del archivo COL_ESTIM_FLOWS
+            ruta_salida: Ruta del archivo flujos_swap_gbo procesado
+            separador: Separador a usar
+            metricas: Si se indica, se completa con las 'filas' escritas y las 'modificaciones'
+            
+        Returns:
+            Sumas de der_vp y obl_vp por cod_emp de los flujos modificados
+        """
+        self.logger.info(f"Iniciando procesamiento de flujos swap por bloques de {self.tamano_bloque} filas")
         
+        self._validar_columnas(df_estimaciones, list(self.ESQUEMAS['estimaciones']['dtypes']), "COL_ESTIM_FLOWS")
+        
+        self._convertir_fechas(df_estimaciones, 'estimaciones')
+        conteo, valores = self._indexar_estimaciones(df_estimaciones)
+        
+        ruta_salida.parent.mkdir(parents=True, exist_ok=True)
+        
+        for encoding in self._encodings_candidatos(ruta_flujos):
+            try:
+                sumas, modificaciones, filas = self._escribir_bloques(
+                    ruta_flujos, ruta_salida, separador, encoding, conteo, valores
+                )
+                break
+            except UnicodeDecodeError:
+                self.logger.warning(f"Encoding {encoding} no válido para {ruta_flujos}, reintentando")
+                continue
+        else:
+            raise Exception(f"No se pudo cargar el archivo con ningún encoding: {ruta_flujos}")
+        
+        self.logger.info(f"Archivo guardado exitosamente: {ruta_salida} ({filas} filas, encoding {encoding})")
         self.logger.info(f"Procesamiento completado. Modificaciones realizadas: {modificaciones}")
-        return df_resultado
+        if metricas is not None:
+            metricas.update(filas=filas, modificaciones=modificaciones)
+        return sumas
+    
+    def _escribir_bloques(self, ruta_flujos: Path, ruta_salida: Path, separador: str, encoding: str,
+                          conteo: pd.Series, valores: Dict[str, pd.Series]) -> Tuple[pd.DataFrame, int, int]:
+        """
+        Lee, modifica y escribe flujos_swap_gbo bloque a bloque con un encoding dado.
+        
+        Returns:
+            Sumas de der_vp/obl_vp por cod_emp, modificaciones realizadas y filas escritas
+        """
+        # Total acumulado por contrato: la memoria depende de los contratos distintos, no de los bloques
+        sumas: Optional[pd.DataFrame] = None
+        modificaciones = 0
+        filas = 0
+        
+        lector = pd.read_csv(ruta_flujos, sep=separador, encoding=encoding, chunksize=self.tamano_bloque,
+                             compression=self._compresion_entrada(ruta_flujos),
+                             **self._argumentos_esquema(self.ESQUEMAS['flujos']))
+        with lector, self._escritura_atomica(ruta_salida) as salida:
+            for numero, bloque in enumerate(lector):
+                if numero == 0:
+                    self._validar_columnas(bloque, list(self.ESQUEMAS['flujos']['dtypes']), "flujos_swap_gbo")
+                
+                self._convertir_fechas(bloque, 'flujos')
+                modificaciones += self._aplicar_estimaciones(bloque, conteo, valores)
+                parcial = self._sumar_vp_por_contrato(bloque)
+                sumas = parcial if sumas is None else sumas.add(parcial, fill_value=0)
+                
+                bloque.to_csv(salida, sep=separador, index=False, header=numero == 0)
+                filas += len(bloque)
+        
+        if sumas is None:
+            sumas = pd.DataFrame(columns=['der_vp', 'obl_vp'])
+        
+        return sumas, modificaciones, filas
     
     def procesar_informe_r5(self, df_informe: pd.DataFrame, df_flujos_modificado: pd.DataFrame) -> pd.DataFrame:
         """
@@ -261,6 +990,27 @@ class SwapProcessor:
             df_informe: DataFrame del archivo Informe_R5_GBO
             df_flujos_modificado: DataFrame modificado de flujos_swap_gbo
             
+        Returns:
+            DataFrame modificado de Informe_R5_GBO
+        """
+        cols_flujos = ['cod_emp', 'der_vp', 'obl_vp']
+        self._validar_columnas(df_flujos_modificado, cols_flujos, "flujos_swap_gbo modificado")
+        
+        sumas = self._sumar_vp_por_contrato(df_flujos_modificado)
+        return self._actualizar_informe_r5(df_informe, sumas)
+    
+    def _sumar_vp_por_contrato(self, df_flujos: pd.DataFrame) -> pd.DataFrame:
+        """Suma der_vp y obl_vp por cod_emp en una sola pasada (los nulos suman 0)."""
+        return df_flujos.groupby('cod_emp', sort=False)[['der_vp', 'obl_vp']].sum()
+    
+    def _actualizar_informe_r5(self, df_informe: pd.DataFrame, sumas: pd.DataFrame) -> pd.DataFrame:
+        """
+        Asigna cupon y cupon_1 del informe R5 a partir de las sumas por contrato.
+        
+        Args:
+            df_informe: DataFrame del archivo Informe_R5_GBO
+            sumas: Sumas de der_vp y obl_vp indexadas por cod_emp
+            
         Returns:
             DataFrame modificado de Informe_R5_GBO
         """
@@ -269,35 +1019,27 @@ class SwapProcessor:
         # Crear copia para no modificar el original
         df_resultado = df_informe.copy()
         
-        # Validar columnas requeridas
-        cols_informe = ['codigo_operacion', 'cupon', 'cupon_1']
-        cols_flujos = ['cod_emp', 'der_vp', 'obl_vp']
-        
-        self._validar_columnas(df_informe, cols_informe, "Informe_R5_GBO")
-        self._validar_columnas(df_flujos_modificado, cols_flujos, "flujos_swap_gbo modificado")
+        self._validar_columnas(df_informe, list(self.ESQUEMAS['informe']['dtypes']), "Informe_R5_GBO")
         
-        modificaciones = 0
+        posiciones = sumas.index.get_indexer(df_informe['codigo_operacion'])
+        coincide = posiciones >= 0
+        modificaciones = int(coincide.sum())
         
-        # Procesar cada fila del informe
-        for idx, row_informe in df_informe.iterrows():
-            codigo_operacion = row_informe['codigo_operacion']
-            
-            # Buscar coincidencias en flujos modificados
-            mask = df_flujos_modificado['cod_emp'] == codigo_operacion
-            flujos_coincidentes = df_flujos_modificado[mask]
+        if modificaciones:
+            # cupon = suma de der_vp / 1000000, cupon_1 = suma de obl_vp / 1000000
+            for col_informe, col_flujos in (('cupon', 'der_vp'), ('cupon_1', 'obl_vp')):
+                nuevos = pd.Series(
+                    sumas[col_flujos].to_numpy()[posiciones] / 1000000, index=df_resultado.index
+                )
+                df_resultado[col_informe] = df_resultado[col_informe].mask(coincide, nuevos)
             
-            if len(flujos_coincidentes) > 0:
-                # Calcular cupon (suma de der_vp / 1000000)
-                suma_der_vp = flujos_coincidentes['der_vp'].fillna(0).sum()
-                df_resultado.loc[idx, 'cupon'] = suma_der_vp / 1000000
-                
-                # Calcular cupon_1 (suma de obl_vp / 1000000)
-                suma_obl_vp = flujos_coincidentes['obl_vp'].fillna(0).sum()
-                df_resultado.loc[idx, 'cupon_1'] = suma_obl_vp / 1000000
-                
-                modificaciones += 1
-                
-                self.logger.debug(f"Código {codigo_operacion}: cupon={suma_der_vp/1000000:.6f}, cupon_1={suma_obl_vp/1000000:.6f}")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                for codigo_operacion, cupon, cupon_1 in zip(
+                    df_resultado.loc[coincide, 'codigo_operacion'],
+                    df_resultado.loc[coincide, 'cupon'],
+                    df_resultado.loc[coincide, 'cupon_1'],
+                ):
+                    self.logger.debug(f"Código {codigo_operacion}: cupon={cupon:.6f}, cupon_1={cupon_1:.6f}")
         
         self.logger.info(f"Procesamiento de informe R5 completado. Modificaciones realizadas: {modificaciones}")
         return df_resultado
@@ -323,9 +1065,13 @@ class SwapProcessor:
         
         self.logger.info(f"Validación de columnas exitosa para {nombre_archivo}")
     
+    def _ruta_salida(self, nombre: str) -> Path:
+        """Ruta en output_dir de una salida, con la extensión de compresion_salida si la hay."""
+        return self.output_dir / (nombre + self.COMPRESIONES_SALIDA.get(self.compresion_salida, ''))
+    
     def guardar_archivo(self, df: pd.DataFrame, ruta: Path, separador: str = ';') -> None:
         """
-        Guarda un DataFrame en un archivo CSV.
+        Guarda un DataFrame en un archivo CSV de forma atómica (ver _escritura_atomica).
         
         Args:
             df: DataFrame a guardar
@@ -339,7 +1085,8 @@ class SwapProcessor:
             ruta.parent.mkdir(parents=True, exist_ok=True)
             
             # Guardar archivo
-            df.to_csv(ruta, sep=separador, index=False, encoding='utf-8')
+            with self._escritura_atomica(ruta) as salida:
+                df.to_csv(salida, sep=separador, index=False)
             
             self.logger.info(f"Archivo guardado exitosamente: {ruta}")
             
@@ -347,50 +1094,516 @@ class SwapProcessor:
             self.logger.error(f"Error al guardar archivo {ruta}: {str(e)}")
             raise
     
-    def procesar_fecha(self, fecha_referencia: str) -> None:
+    @contextmanager
+    def _escritura_atomica(self, ruta: Path) -> Iterator[io.TextIOWrapper]:
+        """
+        Abre una salida de texto UTF-8 que solo aparece en ruta cuando se escribió completa.
+        
+        Se escribe con comun.escritura_atomica, comprimido según compresion_salida: un
+        temporal del mismo directorio con un buffer grande, un único fsync al cerrar y
+        un renombrado sobre ruta. Si la escritura falla, ruta no se modifica.
+        
+        Args:
+            ruta: Ruta final del archivo
+            
+        Yields:
+            Manejador de texto sobre el que escribir el contenido
+        """
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        with escritura_atomica(str(ruta), self.compresion_salida) as salida:
+            yield salida
+    
+    def procesar_fecha(self, fecha_referencia: str) -> bool:
         """
         Procesa todos los archivos para una fecha específica.
         
+        Cada etapa queda medida en el registro de la ejecución, que se guarda en log_dir,
+        se deja en ultima_ejecucion y se entrega a callback_ejecucion.
+        
         Args:
             fecha_referencia: Fecha en formato YYYYMMDD
+            
+        Returns:
+            True si la fecha se procesó, False si se omitió por tener sus salidas al día
         """
+        registro = self._nuevo_registro(fecha_referencia)
+        self.ultima_ejecucion = registro
+        inicio = time.perf_counter()
+        inicio_cpu = time.process_time()
+        
+        # tracemalloc solo se detiene al final si se activó aquí
+        activar_traza = self.perfil_memoria == 'tracemalloc' and not tracemalloc.is_tracing()
+        if activar_traza:
+            tracemalloc.start(self.MARCOS_TRACEMALLOC)
+        
         try:
             self.logger.info(f"=== Iniciando procesamiento para fecha: {fecha_referencia} ===")
             
             # Paso 1: Validar archivos
-            archivos = self.validar_fecha_archivos(fecha_referencia)
+            with self._etapa(registro, 'descubrimiento'):
+                archivos = self.validar_fecha_archivos(fecha_referencia)
+                
+                ruta_flujos_procesado = self._ruta_salida(f"flujos_swap_gbo_{fecha_referencia}_procesado.csv")
+                
+                fecha_obj = datetime.strptime(fecha_referencia, "%Y%m%d")
+                formato_informe = fecha_obj.strftime("%y%m%d")
+                ruta_informe_procesado = self._ruta_salida(f"Informe_R5_GBO_{formato_informe}_procesado.csv")
+                
+                # Salidas de la fecha y las entradas de las que dependen
+                entradas_flujos = [archivos['flujos'], archivos['estimaciones']]
+                salidas = {ruta_flujos_procesado: entradas_flujos}
+                if archivos['informe']:
+                    salidas[ruta_informe_procesado] = entradas_flujos + [archivos['informe']]
+                
+                al_dia = False
+                if self.incremental:
+                    manifiesto = cargar_manifiesto(self.output_dir / self.ARCHIVO_MANIFIESTO)
+                    al_dia = all(self._salida_al_dia(manifiesto, salida, entradas) for salida, entradas in salidas.items())
+                
+                # Firma de las entradas antes de leerlas; es la que se registra en el manifiesto
+                if not al_dia:
+                    firmas = {ruta: firma_archivo(ruta) for ruta in archivos.values() if ruta}
             
-            # Paso 2: Cargar archivos
-            df_flujos = self.cargar_archivo(archivos['flujos'])
-            df_estimaciones = self.cargar_archivo(archivos['estimaciones'])
+            if al_dia:
+                self.logger.info(f"=== Salidas al día para fecha {fecha_referencia}, se omite el procesamiento ===")
+                registro['estado'] = 'omitida'
+                return False
             
-            # Paso 3: Procesar flujos swap
-            df_flujos_modificado = self.procesar_flujos_swap(df_flujos, df_estimaciones)
+            # Paso 2: Cargar archivos
+            with self._etapa(registro, 'carga_estimaciones') as etapa:
+                df_estimaciones = self.cargar_archivo(archivos['estimaciones'])
+                etapa['filas_salida'] = len(df_estimaciones)
             
-            # Guardar archivo flujos modificado
-            nombre_flujos_procesado = f"flujos_swap_gbo_{fecha_referencia}_procesado.csv"
-            ruta_flujos_procesado = self.output_dir / nombre_flujos_procesado
-            self.guardar_archivo(df_flujos_modificado, ruta_flujos_procesado)
+            if self.tamano_bloque:
+                # Paso 3: Procesar y guardar flujos swap bloque a bloque
+                with self._etapa(registro, 'flujos_por_bloques') as etapa:
+                    metricas = {}
+                    sumas_vp = self.procesar_flujos_swap_por_bloques(
+                        archivos['flujos'], df_estimaciones, ruta_flujos_procesado, metricas=metricas
+                    )
+                    etapa['filas_entrada'] = etapa['filas_salida'] = metricas['filas']
+            else:
+                with self._etapa(registro, 'carga_flujos') as etapa:
+                    df_flujos = self.cargar_archivo(archivos['flujos'])
+                    etapa['filas_salida'] = len(df_flujos)
+                
+                # Paso 3: Procesar flujos swap
+                with self._etapa(registro, 'cruce', len(df_flujos)) as etapa:
+                    df_flujos_modificado = self.procesar_flujos_swap(df_flujos, df_estimaciones)
+                    etapa['filas_salida'] = len(df_flujos_modificado)
+                
+                # Guardar archivo flujos modificado
+                with self._etapa(registro, 'escritura_flujos', len(df_flujos_modificado)) as etapa:
+                    self.guardar_archivo(df_flujos_modificado, ruta_flujos_procesado)
+                    etapa['filas_salida'] = len(df_flujos_modificado)
             
             # Paso 4: Procesar informe R5 si existe
             if archivos['informe']:
-                df_informe = self.cargar_archivo(archivos['informe'])
-                df_informe_modificado = self.procesar_informe_r5(df_informe, df_flujos_modificado)
+                with self._etapa(registro, 'carga_informe') as etapa:
+                    df_informe = self.cargar_archivo(archivos['informe'])
+                    etapa['filas_salida'] = len(df_informe)
+                
+                if self.tamano_bloque:
+                    with self._etapa(registro, 'r5', len(df_informe)) as etapa:
+                        df_informe_modificado = self._actualizar_informe_r5(df_informe, sumas_vp)
+                        etapa['filas_salida'] = len(df_informe_modificado)
+                else:
+                    with self._etapa(registro, 'r5', len(df_flujos_modificado)) as etapa:
+                        df_informe_modificado = self.procesar_informe_r5(df_informe, df_flujos_modificado)
+                        etapa['filas_salida'] = len(df_informe_modificado)
                 
                 # Guardar archivo informe modificado
-                fecha_obj = datetime.strptime(fecha_referencia, "%Y%m%d")
-                formato_informe = fecha_obj.strftime("%y%m%d")
-                nombre_informe_procesado = f"Informe_R5_GBO_{formato_informe}_procesado.csv"
-                ruta_informe_procesado = self.output_dir / nombre_informe_procesado
-                self.guardar_archivo(df_informe_modificado, ruta_informe_procesado)
+                with self._etapa(registro, 'escritura_informe', len(df_informe_modificado)) as etapa:
+                    self.guardar_archivo(df_informe_modificado, ruta_informe_procesado)
+                    etapa['filas_salida'] = len(df_informe_modificado)
             else:
                 self.logger.info("Archivo de informe R5 no encontrado, omitiendo procesamiento")
             
+            with self._etapa(registro, 'manifiesto'):
+                self._registrar_salidas(salidas, firmas)
+            
+            registro['estado'] = 'completada'
             self.logger.info(f"=== Procesamiento completado exitosamente para fecha: {fecha_referencia} ===")
+            return True
             
         except Exception as e:
+            registro['estado'] = 'error'
+            registro['error'] = str(e)
             self.logger.error(f"Error durante el procesamiento: {str(e)}")
             raise
+        
+        finally:
+            registro['segundos'] = round(time.perf_counter() - inicio, 6)
+            registro['cpu_segundos'] = round(time.process_time() - inicio_cpu, 6)
+            registro['pico_rss_mb'] = max(
+                [etapa['memoria']['pico_rss_mb'] for etapa in registro['etapas']
+                 if etapa.get('memoria') and etapa['memoria']['pico_rss_mb'] is not None]
+                + [_memoria_proceso()['pico_rss_mb'] or 0]
+            )
+            if activar_traza:
+                tracemalloc.stop()
+            self._guardar_registro(registro)
+            self._notificar_ejecucion(registro)
+    
+    def _nuevo_registro(self, fecha_referencia: str) -> Dict[str, Any]:
+        """
+        Crea el registro estructurado de una ejecución de procesar_fecha.
+        
+        Returns:
+            Diccionario con 'fecha', 'inicio', 'pid', 'configuracion', 'estado'
+            ('completada', 'omitida' o 'error'), 'error', 'segundos', 'cpu_segundos',
+            'pico_rss_mb' (pico del proceso al terminar) y 'etapas' (ver _etapa)
+        """
+        return {
+            'fecha': fecha_referencia,
+            'inicio': datetime.now().isoformat(timespec='milliseconds'),
+            'pid': os.getpid(),
+            'configuracion': self._configuracion(),
+            'estado': None,
+            'error': None,
+            'segundos': None,
+            'cpu_segundos': None,
+            'pico_rss_mb': None,
+            'etapas': [],
+        }
+    
+    @contextmanager
+    def _etapa(self, registro: Dict[str, Any], nombre: str, filas_entrada: int = 0) -> Iterator[Dict[str, Any]]:
+        """
+        Mide una etapa de procesar_fecha y la agrega al registro, aunque falle.
+        
+        El bloque recibe el diccionario de la etapa para completar 'filas_salida' (y
+        'filas_entrada' si no se conocía al empezar). filas_por_segundo se calcula sobre
+        las filas de entrada o, en las cargas, sobre las de salida. Con perfil_memoria
+        se agrega 'memoria' (ver _medir_memoria).
+        
+        Args:
+            registro: Registro de la ejecución
+            nombre: Nombre de la etapa
+            filas_entrada: Filas que recibe la etapa
+        """
+        etapa = {'etapa': nombre, 'filas_entrada': filas_entrada, 'filas_salida': 0}
+        memoria = self._iniciar_memoria() if self.perfil_memoria else None
+        inicio = time.perf_counter()
+        inicio_cpu = time.process_time()
+        try:
+            yield etapa
+        finally:
+            segundos = time.perf_counter() - inicio
+            filas = etapa['filas_entrada'] or etapa['filas_salida']
+            etapa['segundos'] = round(segundos, 6)
+            etapa['cpu_segundos'] = round(time.process_time() - inicio_cpu, 6)
+            etapa['filas_por_segundo'] = round(filas / segundos, 1) if filas and segundos > 0 else None
+            if memoria is not None:
+                etapa['memoria'] = self._medir_memoria(memoria)
+            registro['etapas'].append(etapa)
+    
+    def _iniciar_memoria(self) -> Dict[str, Any]:
+        """Toma el estado de memoria al comenzar una etapa y reinicia los picos."""
+        foto = None
+        if self.perfil_memoria == 'tracemalloc' and tracemalloc.is_tracing():
+            foto = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+        return {'foto': foto, 'pico_por_etapa': _reiniciar_pico_rss(), **_memoria_proceso()}
+    
+    def _medir_memoria(self, inicio: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Resume el uso de memoria de una etapa.
+        
+        Args:
+            inicio: Estado devuelto por _iniciar_memoria al comenzar la etapa
+            
+        Returns:
+            Diccionario con 'rss_inicio_mb', 'rss_fin_mb', 'pico_rss_mb',
+            'pico_por_etapa' (False si el pico de RSS no pudo reiniciarse y es el del
+            proceso) y, con el perfil 'tracemalloc', 'pico_tracemalloc_mb' y 'asignaciones':
+            las ASIGNACIONES_POR_ETAPA pilas que más memoria viva agregaron durante la
+            etapa, con la línea que asignó ('ubicacion') y la última línea de este script
+            en la pila ('origen')
+        """
+        fin = _memoria_proceso()
+        memoria = {
+            'rss_inicio_mb': inicio['rss_mb'],
+            'rss_fin_mb': fin['rss_mb'],
+            'pico_rss_mb': fin['pico_rss_mb'],
+            'pico_por_etapa': inicio['pico_por_etapa'],
+            'pico_tracemalloc_mb': None,
+            'asignaciones': [],
+        }
+        if inicio['foto'] is None or not tracemalloc.is_tracing():
+            return memoria
+        
+        memoria['pico_tracemalloc_mb'] = round(tracemalloc.get_traced_memory()[1] / MB, 3)
+        sin_tracemalloc = (tracemalloc.Filter(False, tracemalloc.__file__),)
+        diferencias = tracemalloc.take_snapshot().filter_traces(sin_tracemalloc).compare_to(
+            inicio['foto'].filter_traces(sin_tracemalloc), 'traceback'
+        )
+        crecimientos = [diferencia for diferencia in diferencias if diferencia.size_diff > 0]
+        for diferencia in crecimientos[:self.ASIGNACIONES_POR_ETAPA]:
+            # Los marcos van del más antiguo al más reciente
+            marcos = diferencia.traceback
+            origen = next((marco for marco in reversed(marcos) if marco.filename == __file__), None)
+            memoria['asignaciones'].append({
+                'ubicacion': f"{marcos[-1].filename}:{marcos[-1].lineno}",
+                'origen': f"{origen.filename}:{origen.lineno}" if origen else None,
+                'mb': round(diferencia.size_diff / MB, 3),
+                'bloques': diferencia.count_diff,
+            })
+        return memoria
+    
+    def _guardar_registro(self, registro: Dict[str, Any]) -> None:
+        """Escribe el registro de una ejecución como JSON en log_dir; un fallo solo se registra."""
+        marca = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+        ruta = self.log_dir / f"ejecucion_{registro['fecha']}_{marca}_{registro['pid']}.json"
+        temporal = ruta.with_name(f"{ruta.name}.tmp")
+        try:
+            with open(temporal, 'w', encoding='utf-8') as archivo:
+                json.dump(registro, archivo, indent=2, ensure_ascii=False)
+            os.replace(temporal, ruta)
+        except OSError as e:
+            self.logger.warning(f"No se pudo guardar el registro de ejecución {ruta}: {e}")
+    
+    def _notificar_ejecucion(self, registro: Dict[str, Any]) -> None:
+        """Entrega el registro a callback_ejecucion; sus errores no afectan al procesamiento."""
+        if self.callback_ejecucion is None:
+            return
+        try:
+            self.callback_ejecucion(registro)
+        except Exception as e:
+            self.logger.warning(f"Error en callback_ejecucion para {registro['fecha']}: {e}")
+    
+    def procesar_fechas(self, fechas: List[str], workers: Optional[int] = 1) -> List[Dict[str, Any]]:
+        """
+        Procesa varias fechas, opcionalmente en paralelo con un pool de procesos.
+        
+        Un error en una fecha no detiene el resto; queda registrado en su resultado.
+        
+        Args:
+            fechas: Fechas en formato YYYYMMDD
+            workers: Número de procesos a usar (None usa todos los núcleos, 1 procesa en serie)
+            
+        Returns:
+            Lista con un resultado por fecha, en el mismo orden de entrada, con las claves
+            'fecha', 'exito', 'omitida', 'segundos', 'error' y 'registro' (el registro de
+            la ejecución)
+        """
+        workers = workers or os.cpu_count() or 1
+        workers = min(workers, len(fechas)) if fechas else 1
+        
+        self.logger.info(f"Procesando {len(fechas)} fechas con {workers} proceso(s)")
+        inicio = time.perf_counter()
+        
+        if workers == 1:
+            resultados = [_procesar_fecha_aislada(self, fecha) for fecha in fechas]
+        else:
+            # Cada proceso del pool crea un solo procesador al arrancar y lo reutiliza en sus
+            # fechas, como en serie; no recibe el callback: se invoca aquí con sus registros
+            with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_proceso_pool,
+                                     initargs=(self._configuracion(),)) as executor:
+                resultados = list(executor.map(_procesar_fecha_en_proceso, fechas))
+            for resultado in resultados:
+                if resultado['registro']:
+                    self._notificar_ejecucion(resultado['registro'])
+        
+        exitosas = sum(1 for resultado in resultados if resultado['exito'])
+        self.logger.info(
+            f"Lote completado en {time.perf_counter() - inicio:.2f}s: "
+            f"{exitosas} exitosas, {len(resultados) - exitosas} con error"
+        )
+        return resultados
+    
+    def vigilar(self, workers: Optional[int] = 1, espera_estabilidad: Optional[float] = None,
+                intervalo: Optional[float] = None, usar_inotify: bool = True,
+                detener: Optional[Callable[[], bool]] = None) -> None:
+        """
+        Vigila data_dir y procesa cada fecha en cuanto sus archivos están completos.
+        
+        Una fecha está lista cuando flujos_swap_gbo y COL_ESTIM_FLOWS existen y su tamaño
+        y mtime (y los de Informe_R5_GBO, si ya llegó) no cambian durante espera_estabilidad
+        segundos. Las fechas listas se procesan con procesar_fechas; una fecha no se
+        vuelve a procesar mientras sus archivos no cambien, haya terminado bien o con error.
+        Si cambian, incluso durante su procesamiento, se procesa de nuevo: el manifiesto
+        guarda la firma que tenían las entradas antes de leerse, así que no la da por al día.
+        Al arrancar se revisan los archivos ya presentes (el manifiesto omite las fechas al día).
+        
+        Los cambios se detectan con inotify si está disponible y, si no, revisando el
+        directorio cada intervalo segundos.
+        
+        Args:
+            workers: Procesos para las fechas que quedan listas a la vez (ver procesar_fechas)
+            espera_estabilidad: Segundos sin cambios para dar por completa una fecha
+                (por defecto ESPERA_ESTABILIDAD)
+            intervalo: Segundos máximos entre revisiones mientras hay fechas por estabilizarse,
+                o entre sondeos sin inotify (por defecto INTERVALO_VIGILANCIA)
+            usar_inotify: Si es False se sondea el directorio aunque inotify esté disponible
+            detener: Función consultada al menos cada intervalo segundos; la vigilancia termina
+                cuando devuelve True. Sin ella se vigila hasta recibir Ctrl+C
+        """
+        espera_estabilidad = self.ESPERA_ESTABILIDAD if espera_estabilidad is None else espera_estabilidad
+        intervalo = self.INTERVALO_VIGILANCIA if intervalo is None else intervalo
+        
+        inotify = None
+        if usar_inotify:
+            try:
+                inotify = _Inotify(self.data_dir)
+            except OSError as e:
+                self.logger.warning(f"No se puede usar inotify ({e}), se sondea {self.data_dir} cada {intervalo}s")
+        self.logger.info(f"Vigilando {self.data_dir} ({'inotify' if inotify else 'sondeo'})")
+        
+        # Fecha -> (firma de sus archivos, momento desde el que no cambia)
+        observadas: Dict[str, Tuple[Tuple[Tuple[str, int, int], ...], float]] = {}
+        # Fecha -> firma con la que ya se procesó
+        procesadas: Dict[str, Tuple[Tuple[str, int, int], ...]] = {}
+        
+        try:
+            while not (detener and detener()):
+                ahora = time.monotonic()
+                listas = []
+                proxima_revision = None
+                
+                firmas = self._firmas_fechas_completas()
+                for fecha in list(observadas):
+                    if fecha not in firmas:
+                        del observadas[fecha]
+                for fecha, firma in firmas.items():
+                    if procesadas.get(fecha) == firma:
+                        continue
+                    if observadas.get(fecha, (None,))[0] != firma:
+                        observadas[fecha] = (firma, ahora)
+                    restante = observadas[fecha][1] + espera_estabilidad - ahora
+                    if restante <= 0:
+                        listas.append(fecha)
+                    else:
+                        proxima_revision = restante if proxima_revision is None else min(proxima_revision, restante)
+                
+                if listas:
+                    listas.sort()
+                    self.logger.info(f"Archivos completos para: {', '.join(listas)}")
+                    for resultado in self.procesar_fechas(listas, workers=workers):
+                        procesadas[resultado['fecha']] = observadas.pop(resultado['fecha'])[0]
+                        if not resultado['exito']:
+                            self.logger.error(f"Error procesando {resultado['fecha']}: {resultado['error']}")
+                    continue
+                
+                # Con detener se revisa al menos cada intervalo para poder terminar a tiempo
+                if proxima_revision is not None:
+                    espera = min(proxima_revision, intervalo)
+                else:
+                    espera = self.INTERVALO_VIGILANCIA_INOTIFY if inotify and not detener else intervalo
+                if inotify:
+                    inotify.esperar(espera)
+                else:
+                    time.sleep(espera)
+        except KeyboardInterrupt:
+            self.logger.info("Vigilancia detenida")
+        finally:
+            if inotify:
+                inotify.close()
+    
+    def _firmas_fechas_completas(self) -> Dict[str, Tuple[Tuple[str, int, int], ...]]:
+        """
+        Devuelve las fechas que ya tienen flujos_swap_gbo y COL_ESTIM_FLOWS en data_dir.
+        
+        Returns:
+            Diccionario fecha YYYYMMDD -> (nombre, tamaño, mtime_ns) de cada uno de sus archivos
+        """
+        indice = self._obtener_indice_archivos()
+        firmas = {}
+        for familia, fecha in indice:
+            if familia != 'flujos' or ('estimaciones', fecha) not in indice:
+                continue
+            rutas = [ruta for otra in self.FAMILIAS_ARCHIVO for ruta in indice.get((otra, fecha), [])]
+            try:
+                estados = [(ruta.name, ruta.stat()) for ruta in rutas]
+            except FileNotFoundError:
+                continue  # se borró o renombró desde que se indexó: se verá en la próxima revisión
+            firmas[fecha] = tuple((nombre, estado.st_size, estado.st_mtime_ns) for nombre, estado in estados)
+        return firmas
+
+
+def _procesar_fecha_aislada(processor: SwapProcessor, fecha: str) -> Dict[str, Any]:
+    """Procesa una fecha capturando el error y el tiempo empleado."""
+    inicio = time.perf_counter()
+    omitida = False
+    processor.ultima_ejecucion = None
+    try:
+        omitida = not processor.procesar_fecha(fecha)
+        error = None
+    except Exception as e:
+        error = str(e)
+    
+    return {
+        'fecha': fecha,
+        'exito': error is None,
+        'omitida': omitida,
+        'segundos': round(time.perf_counter() - inicio, 3),
+        'error': error,
+        'registro': processor.ultima_ejecucion,
+    }
+
+
+# Procesador de cada proceso del pool de procesar_fechas, creado por _iniciar_proceso_pool
+_processor_proceso: Optional[SwapProcessor] = None
+
+
+def _iniciar_proceso_pool(configuracion: Dict[str, Any]) -> None:
+    """Inicializador de los procesos del pool: crea el procesador que usarán todas sus fechas."""
+    global _processor_proceso
+    _processor_proceso = SwapProcessor(**configuracion)
+
+
+def _procesar_fecha_en_proceso(fecha: str) -> Dict[str, Any]:
+    """Punto de entrada de los procesos del pool: usa el procesador del proceso."""
+    return _procesar_fecha_aislada(_processor_proceso, fecha)
+
+
+def generar_rango_fechas(desde: str, hasta: str) -> List[str]:
+    """
+    Genera todas las fechas entre dos fechas, ambas incluidas.
+    
+    Args:
+        desde: Fecha inicial en formato YYYYMMDD
+        hasta: Fecha final en formato YYYYMMDD
+        
+    Returns:
+        Lista de fechas en formato YYYYMMDD
+    """
+    inicio = datetime.strptime(desde, "%Y%m%d")
+    fin = datetime.strptime(hasta, "%Y%m%d")
+    if fin < inicio:
+        raise ValueError(f"Rango de fechas inválido: {desde} > {hasta}")
+    
+    return [(inicio + timedelta(days=dias)).strftime("%Y%m%d") for dias in range((fin - inicio).days + 1)]
+
+
+def _parsear_argumentos(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Define y parsea los argumentos de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Procesamiento de archivos swap por fecha")
+    parser.add_argument("fechas", nargs="*", help="Fechas a procesar en formato YYYYMMDD")
+    parser.add_argument("--desde", help="Fecha inicial de un rango (YYYYMMDD)")
+    parser.add_argument("--hasta", help="Fecha final de un rango (YYYYMMDD), por defecto igual a --desde")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Procesos en paralelo (0 usa todos los núcleos)")
+    parser.add_argument("--tamano-bloque", type=int, default=None,
+                        help="Procesar flujos_swap_gbo en bloques de este número de filas")
+    parser.add_argument("--forzar", action="store_true",
+                        help="Reprocesar aunque las salidas estén al día según el manifiesto")
+    parser.add_argument("--motor-lectura", choices=SwapProcessor.MOTORES_LECTURA, default="pandas",
+                        help="Motor para parsear los archivos completos (pyarrow es multihilo)")
+    parser.add_argument("--perfil-memoria", choices=SwapProcessor.PERFILES_MEMORIA, default=None,
+                        help="Registrar el pico de RSS de cada etapa ('rss') y sus mayores asignaciones ('tracemalloc')")
+    parser.add_argument("--compresion-salida", choices=tuple(SwapProcessor.COMPRESIONES_SALIDA), default=None,
+                        help="Comprimir los archivos procesados (zstd requiere zstandard)")
+    parser.add_argument("--cache", action="store_true",
+                        help="Guardar las entradas parseadas en formato Arrow IPC y reutilizarlas (requiere pyarrow)")
+    parser.add_argument("--vigilar", action="store_true",
+                        help="Vigilar data-dir y procesar cada fecha en cuanto lleguen sus archivos (no usa las fechas indicadas)")
+    parser.add_argument("--espera-estabilidad", type=float, default=None,
+                        help="Con --vigilar, segundos sin cambios en los archivos de una fecha para darlos por completos")
+    parser.add_argument("--data-dir", default="data", help="Directorio de entrada")
+    parser.add_argument("--output-dir", default="procesados", help="Directorio de salida")
+    parser.add_argument("--log-dir", default="logs", help="Directorio de logs")
+    return parser.parse_args(argv)
 
 
 def main():
@@ -398,24 +1611,53 @@ def main():
     Función principal del script.
     """
     try:
-        # Configurar fecha de procesamiento
-        # Cambiar por la fecha deseada en formato YYYYMMDD
-        fecha_procesamiento = "20250603"
+        args = _parsear_argumentos()
+        
+        # Configurar fechas de procesamiento
+        fechas = list(args.fechas)
+        if args.desde:
+            fechas += generar_rango_fechas(args.desde, args.hasta or args.desde)
+        if not fechas:
+            fechas = [FECHA_POR_DEFECTO]
         
         # Crear procesador
-        processor = SwapProcessor()
+        processor = SwapProcessor(
+            data_dir=args.data_dir,
+            output_dir=args.output_dir,
+            log_dir=args.log_dir,
+            tamano_bloque=args.tamano_bloque,
+            incremental=not args.forzar,
+            usar_cache=args.cache,
+            motor_lectura=args.motor_lectura,
+            perfil_memoria=args.perfil_memoria,
+            compresion_salida=args.compresion_salida,
+        )
+        
+        if args.vigilar:
+            processor.vigilar(workers=args.workers or None, espera_estabilidad=args.espera_estabilidad)
+            return
         
         # Procesar archivos
-        processor.procesar_fecha(fecha_procesamiento)
+        resultados = processor.procesar_fechas(fechas, workers=args.workers or None)
         
-        print(f"\n✅ Procesamiento completado exitosamente para fecha: {fecha_procesamiento}")
+        print()
+        for resultado in resultados:
+            if resultado['omitida']:
+                print(f"⏭️  {resultado['fecha']}: sin cambios, se omite")
+            elif resultado['exito']:
+                print(f"✅ {resultado['fecha']}: completado en {resultado['segundos']:.2f}s")
+            else:
+                print(f"❌ {resultado['fecha']}: {resultado['error']} ({resultado['segundos']:.2f}s)")
         print(f"📁 Archivos procesados guardados en: {processor.output_dir}")
         print(f"📋 Logs disponibles en: {processor.log_dir}")
         
+        if not all(resultado['exito'] for resultado in resultados):
+            sys.exit(1)
+        
     except Exception as e:
         print(f"\n❌ Error durante el procesamiento: {str(e)}")
         sys.exit(1)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Benchmark del procesamiento swap y de los limpiadores de caracteres sobre datos sintéticos.
+
+Para cada tamaño pedido genera con prueba.generar_archivos los archivos de una fecha,
+mide cada etapa de SwapProcessor.procesar_fecha y los dos limpiadores
+(quitaespeciales y valida_caracteres_Esp) sobre flujos_swap_gbo, y emite un resultado
+JSON por medición.
+
+Ejemplo:
+    python benchmark.py --filas 10000 1000000 --salida resultados.jsonl
+"""
+
+import os
+import json
+import time
+import shutil
+import sys
+import logging
+import platform
+import argparse
+import tempfile
+import importlib.util
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+import prueba
+import quitaespeciales
+
+RAIZ = Path(__file__).resolve().parent
+
+# Tamaños (filas de flujos_swap_gbo) medidos por defecto
+FILAS_POR_DEFECTO = (10_000, 1_000_000, 10_000_000)
+
+# Fecha de los archivos generados
+FECHA = "20250603"
+
+
+def _cargar_modulo(nombre: str, ruta: Path) -> Any:
+    """Importa un script por ruta (32_r5.py no es importable por nombre)."""
+    # Los scripts importan comun.py desde su propio directorio
+    if str(ruta.parent) not in sys.path:
+        sys.path.insert(0, str(ruta.parent))
+    spec = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def _medir(funcion: Callable, *args: Any) -> Tuple[Any, float, float]:
+    """Ejecuta una función y devuelve su resultado, el tiempo de pared y el de CPU en segundos."""
+    inicio_cpu = time.process_time()
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return resultado, time.perf_counter() - inicio, time.process_time() - inicio_cpu
+
+
+def _registro(suite: str, etapa: str, filas: int, segundos: float, cpu: float, **extra: Any) -> Dict[str, Any]:
+    """Arma el resultado de una medición."""
+    return {
+        'suite': suite,
+        'etapa': etapa,
+        'filas': filas,
+        'segundos': round(segundos, 6),
+        'cpu_segundos': round(cpu, 6),
+        'filas_por_segundo': round(filas / segundos, 1) if segundos > 0 else None,
+        **extra,
+    }
+
+
+def medir_swap(swap: Any, directorio: Path, filas: int) -> List[Dict[str, Any]]:
+    """
+    Mide por separado cada etapa de SwapProcessor.procesar_fecha.
+
+    Args:
+        swap: Módulo 32_r5 cargado
+        directorio: Directorio con data/ ya generado
+        filas: Filas de flujos_swap_gbo, registradas en los resultados
+
+    Returns:
+        Un resultado por etapa
+    """
+    processor = swap.SwapProcessor(
+        data_dir=str(directorio / "data"),
+        output_dir=str(directorio / "procesados"),
+        log_dir=str(directorio / "logs"),
+        incremental=False,
+    )
+    resultados = []
+
+    archivos, segundos, cpu = _medir(processor.validar_fecha_archivos, FECHA)
+    resultados.append(_registro('swap', 'descubrimiento', filas, segundos, cpu))
+
+    df_estimaciones, segundos, cpu = _medir(processor.cargar_archivo, archivos['estimaciones'])
+    resultados.append(_registro('swap', 'carga_estimaciones', len(df_estimaciones), segundos, cpu))
+
+    df_flujos, segundos, cpu = _medir(processor.cargar_archivo, archivos['flujos'])
+    resultados.append(_registro('swap', 'carga_flujos', len(df_flujos), segundos, cpu))
+
+    df_flujos, segundos, cpu = _medir(processor.procesar_flujos_swap, df_flujos, df_estimaciones)
+    resultados.append(_registro('swap', 'cruce', len(df_flujos), segundos, cpu))
+
+    _, segundos, cpu = _medir(processor.guardar_archivo, df_flujos, directorio / "procesados" / "flujos.csv")
+    resultados.append(_registro('swap', 'escritura_flujos', len(df_flujos), segundos, cpu))
+
+    df_informe, segundos, cpu = _medir(processor.cargar_archivo, archivos['informe'])
+    resultados.append(_registro('swap', 'carga_informe', len(df_informe), segundos, cpu))
+
+    df_informe, segundos, cpu = _medir(processor.procesar_informe_r5, df_informe, df_flujos)
+    resultados.append(_registro('swap', 'r5', len(df_flujos), segundos, cpu))
+
+    _, segundos, cpu = _medir(processor.guardar_archivo, df_informe, directorio / "procesados" / "informe.csv")
+    resultados.append(_registro('swap', 'escritura_informe', len(df_informe), segundos, cpu))
+
+    return resultados
+
+
+def medir_limpiadores(valida: Any, directorio: Path, filas: int) -> List[Dict[str, Any]]:
+    """
+    Mide los dos limpiadores de caracteres sobre el archivo flujos_swap_gbo generado.
+
+    Args:
+        valida: Módulo valida_caracteres_Esp/utils cargado
+        directorio: Directorio con data/ ya generado
+        filas: Filas del archivo, registradas en los resultados
+
+    Returns:
+        Un resultado por limpiador
+    """
+    entrada = directorio / "data" / f"flujos_swap_gbo_{FECHA}.csv"
+    salida = directorio / "limpios"
+    salida.mkdir(exist_ok=True)
+    megabytes = round(entrada.stat().st_size / 1024 / 1024, 3)
+
+    resultados = []
+    _, segundos, cpu = _medir(quitaespeciales.limpiar_archivo, str(entrada), str(salida / "quitaespeciales.csv"))
+    resultados.append(_registro('limpiadores', 'quitaespeciales', filas, segundos, cpu, megabytes=megabytes))
+
+    _, segundos, cpu = _medir(valida.procesar_archivo, str(entrada), str(salida))
+    resultados.append(_registro('limpiadores', 'valida_caracteres', filas, segundos, cpu, megabytes=megabytes))
+    return resultados
+
+
+def ejecutar(filas_por_tamano: List[int], parametros: Dict[str, Any],
+             directorio_base: Optional[Path] = None) -> List[Dict[str, Any]]:
+    """
+    Genera los datos y ejecuta todas las mediciones para cada tamaño.
+
+    Args:
+        filas_por_tamano: Filas de flujos_swap_gbo de cada tamaño a medir
+        parametros: Argumentos adicionales de prueba.generar_archivos
+        directorio_base: Dónde generar los datos (por defecto un directorio temporal)
+
+    Returns:
+        Todos los resultados, incluida la generación de datos
+    """
+    swap = _cargar_modulo("swap_r5", RAIZ / "32_r5.py")
+    valida = _cargar_modulo("valida_utils", RAIZ / "valida_caracteres_Esp" / "utils.py")
+
+    resultados = []
+    for filas in filas_por_tamano:
+        directorio = Path(tempfile.mkdtemp(prefix=f"bench_{filas}_", dir=directorio_base))
+        try:
+            _, segundos, cpu = _medir(
+                lambda: prueba.generar_archivos(directorio / "data", FECHA, filas, **parametros)
+            )
+            resultados.append(_registro('datos', 'generacion', filas, segundos, cpu))
+            resultados.extend(medir_swap(swap, directorio, filas))
+            resultados.extend(medir_limpiadores(valida, directorio, filas))
+        finally:
+            shutil.rmtree(directorio, ignore_errors=True)
+
+    return resultados
+
+
+def _parsear_argumentos(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Define y parsea los argumentos de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Benchmark del procesamiento swap y de los limpiadores")
+    parser.add_argument("--filas", type=int, nargs="+", default=list(FILAS_POR_DEFECTO),
+                        help="Filas de flujos_swap_gbo de cada tamaño a medir")
+    parser.add_argument("--contratos", type=int, default=None,
+                        help="Contratos distintos (por defecto una décima parte de las filas)")
+    parser.add_argument("--proporcion-cruce", type=float, default=0.5,
+                        help="Fracción de estimaciones y filas del informe que cruzan con los flujos")
+    parser.add_argument("--sesgo", type=float, default=0.0,
+                        help="Exponente Zipf de la frecuencia de contratos (0 = uniforme)")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla aleatoria")
+    parser.add_argument("--directorio", default=None, help="Directorio para los datos temporales")
+    parser.add_argument("--salida", default=None,
+                        help="Archivo JSON Lines de resultados (por defecto la salida estándar)")
+    return parser.parse_args(argv)
+
+
+def main():
+    """
+    Función principal del script.
+    """
+    args = _parsear_argumentos()
+
+    # Los logs de las etapas medidas (a stderr) solo interesan si son avisos o errores
+    logging.getLogger().setLevel(logging.WARNING)
+
+    parametros = {
+        'contratos': args.contratos,
+        'proporcion_cruce': args.proporcion_cruce,
+        'sesgo': args.sesgo,
+        'semilla': args.semilla,
+    }
+    entorno = {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        **parametros,
+    }
+
+    resultados = ejecutar(args.filas, parametros, Path(args.directorio) if args.directorio else None)
+
+    lineas = [json.dumps({**entorno, **resultado}, ensure_ascii=False) for resultado in resultados]
+    if args.salida:
+        Path(args.salida).write_text("\n".join(lineas) + "\n", encoding="utf-8")
+    else:
+        print("\n".join(lineas))
+
+
+if __name__ == "__main__":
+    main()
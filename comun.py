@@ -0,0 +1,202 @@
+"""
+Funciones compartidas por los scripts de procesamiento (1s.py, 2s_r5.py, 32_r5.py,
+quitaespeciales.py y valida_caracteres_Esp): lectura con esquema declarado, conversión de
+fechas, escritura atómica de las salidas y manifiesto de salidas generadas.
+"""
+
+import io
+import os
+import gzip
+import json
+import time
+import hashlib
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+except ImportError:  # pyarrow es opcional: sin él se usa el lector de pandas
+    pa = pa_csv = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard es opcional: sin él no se escriben salidas .zst
+    zstandard = None
+
+# Motor de lectura de los archivos: 'pandas' o 'pyarrow' (multihilo)
+MOTOR_LECTURA = "pandas"
+
+# Compresión de las salidas: None, 'gzip' o 'zstd' (requiere zstandard); agrega la extensión al nombre
+COMPRESION_SALIDA = None
+EXTENSIONES_COMPRESION = {'gzip': '.gz', 'zstd': '.zst'}
+
+# Buffer del archivo temporal en el que se escribe cada salida antes de renombrarla
+TAMANO_BUFFER_ESCRITURA = 8 * 1024 * 1024
+
+# Función para leer un archivo separado por ';' aplicando su esquema declarado (columna -> dtype).
+# Las columnas no declaradas se leen como texto, o se descartan si solo_declaradas.
+# Con pyarrow las columnas de texto quedan respaldadas por Arrow.
+def leer_archivo(ruta, esquema, solo_declaradas=False, motor=None):
+    motor = motor or MOTOR_LECTURA
+    if motor == 'pyarrow' and pa_csv is None:
+        logging.warning("pyarrow no está instalado, se usa el lector de pandas")
+        motor = 'pandas'
+
+    inicio = time.perf_counter()
+    if motor == 'pyarrow':
+        opciones_parseo = pa_csv.ParseOptions(delimiter=';')
+        # Los nombres de columna salen del primer bloque; las no declaradas se leen como texto
+        with pa_csv.open_csv(ruta, parse_options=opciones_parseo) as lector:
+            columnas = lector.schema.names
+        tabla = pa_csv.read_csv(ruta, parse_options=opciones_parseo, convert_options=pa_csv.ConvertOptions(
+            column_types={col: pa.type_for_alias(esquema.get(col, 'str')) for col in columnas},
+            include_columns=[col for col in columnas if col in esquema] if solo_declaradas else [],
+            strings_can_be_null=True))
+        df = tabla.to_pandas(types_mapper={pa.string(): pd.StringDtype('pyarrow')}.get)
+    else:
+        # round_trip: los importes se parsean igual que con float()
+        df = pd.read_csv(ruta, sep=';', dtype=defaultdict(lambda: 'str', esquema),
+                         usecols=esquema.__contains__ if solo_declaradas else None,
+                         float_precision='round_trip')
+
+    logging.info(f"Leído {ruta}: {len(df)} filas (motor {motor}, {time.perf_counter() - inicio:.3f}s)")
+    return df
+
+# Formatos probados, en orden, en las columnas de fecha sin formato declarado
+FORMATOS_FECHA_CANDIDATOS = ('%Y-%m-%d', '%d/%m/%Y', '%Y%m%d', '%d-%m-%Y',
+                             '%Y-%m-%d %H:%M:%S', '%d/%m/%Y %H:%M:%S')
+
+# Valores distintos usados para detectar el formato de una columna de fechas
+MUESTRA_FECHAS = 1000
+
+# Función que detecta el formato de una columna de fechas a partir de sus valores distintos:
+# se prueba cada formato de FORMATOS_FECHA_CANDIDATOS sobre una muestra y se elige el que
+# convierte más. El formato previo se mantiene mientras siga convirtiendo la muestra.
+# Devuelve None si ninguno sirve y pandas debe inferirlo por valor.
+def detectar_formato_fecha(unicos, columna, previo=None):
+    muestra = pd.Series(unicos[:MUESTRA_FECHAS])
+    if muestra.empty or (previo and pd.to_datetime(muestra, format=previo, errors='coerce').notna().any()):
+        return previo
+
+    formato, convertidos_formato = None, 0
+    for candidato in FORMATOS_FECHA_CANDIDATOS:
+        convertidos = int(pd.to_datetime(muestra, format=candidato, errors='coerce').notna().sum())
+        if convertidos > convertidos_formato:
+            formato, convertidos_formato = candidato, convertidos
+
+    if formato:
+        logging.info(f"Formato de fecha detectado para {columna}: {formato}")
+    else:
+        logging.warning(f"No se detectó el formato de fecha de {columna}, se infiere por valor")
+    return formato
+
+# Función para convertir una columna de fechas a datetime. Las columnas de fecha tienen muy
+# pocos valores distintos: cada uno se parsea una sola vez y el resultado se reparte por
+# posición a todas las filas. Sin formato se detecta con detectar_formato_fecha; si se pasa
+# el diccionario detectados, el formato de la columna se guarda ahí y se reutiliza en las
+# siguientes llamadas. Con formato_salida se devuelven textos en ese formato en lugar de
+# datetime. Con errores='coerce' los inválidos quedan vacíos; con 'raise' se lanza ValueError.
+def convertir_fechas(serie, formato=None, detectados=None, formato_salida=None, errores='coerce'):
+    codigos, unicos = pd.factorize(serie)
+    if formato is None:
+        previo = detectados.get(serie.name) if detectados is not None else None
+        formato = detectar_formato_fecha(unicos, serie.name, previo)
+        if formato and detectados is not None:
+            detectados[serie.name] = formato
+
+    fechas = pd.to_datetime(unicos, format=formato, errors=errores)
+    if formato_salida is None:
+        vacio = pd.NaT
+    else:
+        fechas, vacio = fechas.strftime(formato_salida), float('nan')
+    return pd.Series(fechas.take(codigos, allow_fill=True, fill_value=vacio), index=serie.index)
+
+# Función que agrega a un nombre de salida la extensión de COMPRESION_SALIDA, si la hay
+def nombre_salida(nombre):
+    return nombre + EXTENSIONES_COMPRESION.get(COMPRESION_SALIDA, '')
+
+# Función que abre una salida de texto UTF-8 que solo aparece en ruta_salida cuando se escribió
+# completa: se escribe en un temporal del mismo directorio con un buffer grande, comprimido con
+# 'gzip' o 'zstd' si se indica, se hace un fsync y se renombra sobre la ruta final. Si falla,
+# el temporal se borra y la ruta final no se modifica.
+@contextmanager
+def escritura_atomica(ruta_salida, compresion=None):
+    directorio, nombre = os.path.split(ruta_salida)
+    temporal = os.path.join(directorio, f".{nombre}.{os.getpid()}.tmp")
+    try:
+        with open(temporal, 'wb', buffering=TAMANO_BUFFER_ESCRITURA) as crudo:
+            if compresion == 'gzip':
+                # mtime=0: la misma salida produce siempre los mismos bytes
+                comprimido = gzip.GzipFile(filename=os.path.splitext(nombre)[0], fileobj=crudo,
+                                           mode='wb', compresslevel=6, mtime=0)
+            elif compresion == 'zstd':
+                if zstandard is None:
+                    raise ImportError(f"zstandard no está instalado, no se puede escribir {ruta_salida}")
+                comprimido = zstandard.ZstdCompressor().stream_writer(crudo, closefd=False)
+            else:
+                comprimido = crudo
+
+            salida = io.TextIOWrapper(comprimido, encoding='utf-8', newline='')
+            yield salida
+            # Separar el envoltorio de texto para que no cierre el archivo antes del fsync
+            salida.flush()
+            salida.detach()
+            if comprimido is not crudo:
+                comprimido.close()  # escribe el final del flujo comprimido, crudo sigue abierto
+
+            crudo.flush()
+            os.fsync(crudo.fileno())
+        os.replace(temporal, ruta_salida)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+# Función para guardar un DataFrame como CSV de forma atómica, comprimido según COMPRESION_SALIDA
+def guardar_csv(df, ruta_salida):
+    with escritura_atomica(ruta_salida, COMPRESION_SALIDA) as f:
+        df.to_csv(f, sep=';', index=False)
+
+# Función para calcular tamaño, mtime y hash del contenido de un archivo
+def firma_archivo(ruta):
+    estado = os.stat(ruta)
+    digest = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(bloque)
+    return {'tamano': estado.st_size, 'mtime_ns': estado.st_mtime_ns, 'sha256': digest.hexdigest()}
+
+# Función para leer un manifiesto; si no existe o está dañado se empieza de cero
+def cargar_manifiesto(ruta):
+    try:
+        with open(ruta, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logging.warning(f"Manifiesto ilegible, se reprocesará todo: {ruta} ({e})")
+        return {}
+
+# Función para guardar un manifiesto de forma atómica
+def guardar_manifiesto(ruta, manifiesto):
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, indent=2, sort_keys=True)
+    os.replace(temporal, ruta)
+
+# Función que indica si una salida se generó con la versión indicada a partir de la misma entrada.
+# El manifiesto se indexa por el nombre de la entrada. Si tamaño y mtime coinciden no se relee
+# la entrada; si solo cambió el mtime se compara el hash.
+def salida_al_dia(manifiesto, version, entrada_path, salida_path):
+    registro = manifiesto.get(os.path.basename(entrada_path))
+    if not registro or registro.get('version') != version or not os.path.exists(salida_path):
+        return False
+    firma = registro['entrada']
+    estado = os.stat(entrada_path)
+    if estado.st_size != firma['tamano']:
+        return False
+    return estado.st_mtime_ns == firma['mtime_ns'] or firma_archivo(entrada_path)['sha256'] == firma['sha256']
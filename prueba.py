@@ -1,37 +1,104 @@
 from pathlib import Path
+from datetime import datetime
+import argparse
+import numpy as np
 import pandas as pd
 
-# Crear carpetas necesarias
-Path("data").mkdir(exist_ok=True)
-Path("procesados").mkdir(exist_ok=True)
-Path("logs").mkdir(exist_ok=True)
-
-# Crear archivo COL_ESTIM_FLOWS_03062025.dat
-estimaciones = pd.DataFrame({
-    "M_CONTRACT_": ["ABC123", "XYZ789"],
-    "M_DATE": ["03/06/2025", "03/06/2025"],
-    "M_DISCFLOW": [1000.0, -2000.0],
-    "M_FLOW_COL": [-1500.0, 3000.0]
-})
-estimaciones.to_csv("data/COL_ESTIM_FLOWS_03062025.dat", sep=";", index=False)
-
-# Crear archivo flujos_swap_gbo_20250603.csv
-flujos = pd.DataFrame({
-    "cod_emp": ["ABC123", "XYZ789", "ZZZ999"],
-    "fecha_cobro": ["2025-06-03", "2025-06-03", "2025-06-03"],
-    "der_intereses": [0, 0, 0],
-    "obl_intereses": [0, 0, 0],
-    "der_vp": [0, 0, 0],
-    "obl_vp": [0, 0, 0]
-})
-flujos.to_csv("data/flujos_swap_gbo_20250603.csv", sep=";", index=False)
-
-# Crear archivo Informe_R5_GBO_250603.csv
-informe = pd.DataFrame({
-    "codigo_operacion": ["ABC123", "XYZ789", "NO_MATCH"],
-    "cupon": [0, 0, 0],
-    "cupon_1": [0, 0, 0]
-})
-informe.to_csv("data/Informe_R5_GBO_250603.csv", sep=";", index=False)
-
-"Archivos de prueba generados exitosamente en la carpeta 'data/'."
+# Textos con tildes y ñ, y códigos afectados por los patrones de los limpiadores
+DESCRIPCIONES = np.array(["Compañía Ñandú", "Peñalosa y Cía", "Crédito Bogotá", "Operación Medellín", "Swap IBR"])
+CODIGOS_CIUDAD = np.array(["033", "011001", "05001", "76001"])
+
+# Función para elegir n contratos de 0..contratos-1. Con sesgo > 0 la frecuencia sigue
+# una ley de Zipf con ese exponente (pocos contratos concentran muchas filas).
+def elegir_contratos(rng, contratos, n, sesgo):
+    if sesgo <= 0:
+        return rng.integers(0, contratos, n)
+    pesos = 1.0 / np.arange(1, contratos + 1) ** sesgo
+    return rng.choice(contratos, n, p=pesos / pesos.sum())
+
+# Función para generar los archivos flujos_swap_gbo, COL_ESTIM_FLOWS e Informe_R5_GBO de una fecha.
+# proporcion_cruce es la fracción de estimaciones y de filas del informe cuya clave
+# existe en los flujos; el resto usa contratos que no cruzan.
+def generar_archivos(carpeta="data", fecha="20250603", filas=3, filas_estimaciones=None, filas_informe=None,
+                     contratos=None, proporcion_cruce=0.5, sesgo=0.0, semilla=0):
+    rng = np.random.default_rng(semilla)
+    carpeta = Path(carpeta)
+    carpeta.mkdir(parents=True, exist_ok=True)
+
+    fecha_obj = datetime.strptime(fecha, "%Y%m%d")
+    contratos = contratos or max(filas // 10, 1)
+    filas_estimaciones = filas_estimaciones if filas_estimaciones is not None else max(filas // 5, 1)
+    filas_informe = filas_informe if filas_informe is not None else contratos
+    codigos = np.char.add("OP", np.arange(contratos).astype(str))
+
+    # flujos_swap_gbo: un flujo por fila con los importes aún sin estimar
+    flujos = pd.DataFrame({
+        "cod_emp": codigos[elegir_contratos(rng, contratos, filas, sesgo)],
+        "fecha_cobro": fecha_obj.strftime("%Y-%m-%d"),
+        "der_intereses": 0,
+        "obl_intereses": 0,
+        "der_vp": 0,
+        "obl_vp": 0,
+        "descripcion": DESCRIPCIONES[rng.integers(0, len(DESCRIPCIONES), filas)],
+        "cod_ciudad": CODIGOS_CIUDAD[rng.integers(0, len(CODIGOS_CIUDAD), filas)],
+    })
+    ruta_flujos = carpeta / f"flujos_swap_gbo_{fecha}.csv"
+    flujos.to_csv(ruta_flujos, sep=";", index=False)
+
+    # COL_ESTIM_FLOWS: importes con signo; los que no cruzan usan contratos inexistentes
+    cruza = rng.random(filas_estimaciones) < proporcion_cruce
+    contratos_estimaciones = np.where(
+        cruza,
+        codigos[elegir_contratos(rng, contratos, filas_estimaciones, sesgo)],
+        np.char.add("SC", np.arange(filas_estimaciones).astype(str)),
+    )
+    estimaciones = pd.DataFrame({
+        "M_CONTRACT_": contratos_estimaciones,
+        "M_DATE": fecha_obj.strftime("%d/%m/%Y"),
+        "M_DISCFLOW": rng.normal(0, 1e6, filas_estimaciones).round(2),
+        "M_FLOW_COL": rng.normal(0, 1e6, filas_estimaciones).round(2),
+    })
+    ruta_estimaciones = carpeta / f"COL_ESTIM_FLOWS_{fecha_obj.strftime('%d%m%Y')}.dat"
+    estimaciones.to_csv(ruta_estimaciones, sep=";", index=False)
+
+    # Informe_R5_GBO: una fila por operación, parte de ellas sin flujos
+    cruza = rng.random(filas_informe) < proporcion_cruce
+    informe = pd.DataFrame({
+        "codigo_operacion": np.where(
+            cruza,
+            codigos[rng.integers(0, contratos, filas_informe)],
+            np.char.add("SC", np.arange(filas_informe).astype(str)),
+        ),
+        "cupon": 0,
+        "cupon_1": 0,
+    })
+    ruta_informe = carpeta / f"Informe_R5_GBO_{fecha_obj.strftime('%y%m%d')}.csv"
+    informe.to_csv(ruta_informe, sep=";", index=False)
+
+    return {"flujos": ruta_flujos, "estimaciones": ruta_estimaciones, "informe": ruta_informe}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera archivos swap sintéticos para pruebas y benchmarks")
+    parser.add_argument("--carpeta", default="data", help="Carpeta donde se crean los archivos")
+    parser.add_argument("--fecha", default="20250603", help="Fecha de los archivos (YYYYMMDD)")
+    parser.add_argument("--filas", type=int, default=3, help="Filas de flujos_swap_gbo")
+    parser.add_argument("--filas-estimaciones", type=int, default=None,
+                        help="Filas de COL_ESTIM_FLOWS (por defecto una quinta parte de --filas)")
+    parser.add_argument("--filas-informe", type=int, default=None,
+                        help="Filas de Informe_R5_GBO (por defecto una por contrato)")
+    parser.add_argument("--contratos", type=int, default=None,
+                        help="Contratos distintos (por defecto una décima parte de --filas)")
+    parser.add_argument("--proporcion-cruce", type=float, default=0.5,
+                        help="Fracción de estimaciones y filas del informe que cruzan con los flujos")
+    parser.add_argument("--sesgo", type=float, default=0.0,
+                        help="Exponente Zipf de la frecuencia de contratos (0 = uniforme)")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla aleatoria")
+    args = parser.parse_args()
+
+    # Crear carpetas necesarias
+    Path("procesados").mkdir(exist_ok=True)
+    Path("logs").mkdir(exist_ok=True)
+
+    generar_archivos(args.carpeta, args.fecha, args.filas, args.filas_estimaciones, args.filas_informe,
+                     args.contratos, args.proporcion_cruce, args.sesgo, args.semilla)
+    print(f"Archivos de prueba generados exitosamente en la carpeta '{args.carpeta}/'.")
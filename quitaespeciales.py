@@ -1,6 +1,13 @@
 import os
+import time
+import mmap
+import argparse
 import unicodedata
 import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from comun import firma_archivo, cargar_manifiesto, guardar_manifiesto, salida_al_dia
 
 # Configura el logging
 logging.basicConfig(
@@ -8,6 +15,24 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+# Quita tildes de un carácter: descomposición NFKD sin marcas combinantes
+def _sin_tildes(caracter):
+    descompuesto = unicodedata.normalize('NFKD', caracter)
+    return ''.join([c for c in descompuesto if not unicodedata.combining(c)])
+
+# Tabla para str.translate. Los caracteres no precargados se calculan y se
+# memorizan la primera vez que aparecen, así el resultado es idéntico a NFKD.
+class _TablaSinTildes(dict):
+    def __missing__(self, codigo):
+        reemplazo = _sin_tildes(chr(codigo))
+        self[codigo] = reemplazo
+        return reemplazo
+
+# Precarga Latin-1 y Latin Extended-A/B (vocales con tilde, ñ/Ñ, etc.)
+TABLA_SIN_TILDES = _TablaSinTildes()
+for _codigo in range(0x00C0, 0x0250):
+    TABLA_SIN_TILDES[_codigo]
+
 # Función para limpiar caracteres especiales
 def limpiar_texto(texto):
     """
@@ -15,36 +40,272 @@ def limpiar_texto(texto):
       - Cambia ñ/Ñ por n/N
       - Quita tildes de vocales
     """
-    # Reemplaza ñ/Ñ por n/N
-    texto = texto.replace('ñ', 'n').replace('Ñ', 'N')
-    # Quita tildes usando unicodedata
-    texto = unicodedata.normalize('NFKD', texto)
-    texto = ''.join([c for c in texto if not unicodedata.combining(c)])
-    return texto
-
-# Función principal para procesar los archivos
-def procesar_archivos(directorio_entrada, directorio_salida):
+    # Las líneas ASCII no tienen nada que limpiar
+    if texto.isascii():
+        return texto
+    return texto.translate(TABLA_SIN_TILDES)
+
+# Tamaño aproximado de cada bloque que procesa el motor de bytes
+TAMANO_BLOQUE = 16 * 1024 * 1024
+
+# Tamaño aproximado de cada rango que limpia un proceso al paralelizar dentro de un archivo.
+# Los archivos más pequeños se limpian siempre en un solo proceso.
+TAMANO_RANGO = 32 * 1024 * 1024
+
+# Bytes máximos de rangos en vuelo (enviados al pool o limpios y pendientes de escribir)
+# que puede retener el proceso principal al paralelizar dentro de un archivo
+MEMORIA_EN_VUELO = 256 * 1024 * 1024
+
+# Reemplazos exactos de patrones, aplicados después de quitar tildes
+PATRONES = [(b';033;', b';33;'), (b';011001;', b';11001;')]
+
+# Bytes ASCII, que nunca cambian al quitar tildes
+_BYTES_ASCII = bytes(range(128))
+
+# Tabla de secuencias UTF-8 -> bytes sin tildes, construida a partir de TABLA_SIN_TILDES
+class _TablaBytesSinTildes(dict):
+    def __missing__(self, secuencia):
+        reemplazo = secuencia.decode('utf-8').translate(TABLA_SIN_TILDES).encode('utf-8')
+        self[secuencia] = reemplazo
+        return reemplazo
+
+TABLA_BYTES_SIN_TILDES = _TablaBytesSinTildes()
+for _codigo in range(0x00C0, 0x0250):
+    TABLA_BYTES_SIN_TILDES[chr(_codigo).encode('utf-8')]
+
+# Función para limpiar un bloque de bytes UTF-8 formado por líneas completas
+def limpiar_bytes(bloque):
+    if b'\r' in bloque:
+        # Igual que la lectura en modo texto: \r\n y \r se convierten en \n
+        bloque = bloque.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+    if not bloque.isascii():
+        # Validar el bloque y reemplazar solo los caracteres no ASCII que aparecen en él
+        bloque.decode('utf-8')
+        for caracter in set(bloque.translate(None, _BYTES_ASCII).decode('utf-8')):
+            secuencia = caracter.encode('utf-8')
+            reemplazo = TABLA_BYTES_SIN_TILDES[secuencia]
+            if reemplazo != secuencia:
+                bloque = bloque.replace(secuencia, reemplazo)
+    for patron, reemplazo in PATRONES:
+        bloque = bloque.replace(patron, reemplazo)
+    if os.linesep != '\n':
+        bloque = bloque.replace(b'\n', os.linesep.encode())
+    return bloque
+
+# Función para dividir un buffer en rangos de ~tamano bytes que terminan en fin de línea
+def rangos_por_lineas(buffer, tamano, inicio=0, fin=None):
+    fin = len(buffer) if fin is None else fin
+    while inicio < fin:
+        corte = min(inicio + tamano, fin)
+        if corte < fin:
+            salto = buffer.rfind(b'\n', inicio, corte)
+            if salto == -1:
+                salto = buffer.find(b'\n', corte, fin)
+            corte = fin if salto == -1 else salto + 1
+        yield inicio, corte
+        inicio = corte
+
+# Función para limpiar un archivo completo con el motor de bytes (mmap + bloques grandes)
+def limpiar_archivo(entrada_path, salida_path):
+    with open(entrada_path, 'rb') as f_in, \
+         open(salida_path, 'wb', buffering=TAMANO_BLOQUE) as f_out:
+        if os.fstat(f_in.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f_in.fileno(), 0, access=mmap.ACCESS_READ) as datos:
+            for inicio, fin in rangos_por_lineas(datos, TAMANO_BLOQUE):
+                f_out.write(limpiar_bytes(datos[inicio:fin]))
+        f_out.flush()
+        os.fsync(f_out.fileno())
+
+# Función que limpia un rango [inicio, fin) de un archivo; se ejecuta en los procesos del pool
+def limpiar_rango(entrada_path, inicio, fin):
+    with open(entrada_path, 'rb') as f_in, \
+         mmap.mmap(f_in.fileno(), 0, access=mmap.ACCESS_READ) as datos:
+        return b''.join(
+            limpiar_bytes(datos[a:b]) for a, b in rangos_por_lineas(datos, TAMANO_BLOQUE, inicio, fin)
+        )
+
+# Función para escribir un rango limpio en su posición del archivo de salida
+def escribir_en_posicion(fd, datos, desplazamiento):
+    vista = memoryview(datos)
+    while vista:
+        if hasattr(os, 'pwrite'):
+            escritos = os.pwrite(fd, vista, desplazamiento)
+        else:
+            os.lseek(fd, desplazamiento, os.SEEK_SET)
+            escritos = os.write(fd, vista)
+        vista = vista[escritos:]
+        desplazamiento += escritos
+    return desplazamiento
+
+# Función para limpiar un único archivo grande en paralelo.
+# El archivo se divide en rangos alineados a fin de línea que se limpian en un pool de procesos;
+# los resultados se escriben en orden, por posición, sobre una salida con espacio reservado.
+def limpiar_archivo_paralelo(entrada_path, salida_path, workers=None):
+    workers = workers or os.cpu_count() or 1
+    with open(entrada_path, 'rb') as f_in:
+        tamano = os.fstat(f_in.fileno()).st_size
+        if tamano == 0:
+            open(salida_path, 'wb').close()
+            return
+        with mmap.mmap(f_in.fileno(), 0, access=mmap.ACCESS_READ) as datos:
+            rangos = list(rangos_por_lineas(datos, TAMANO_RANGO))
+
+    fd = os.open(salida_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o666)
+    try:
+        # La salida suele ocupar lo mismo o algo menos que la entrada; se ajusta al final
+        if hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(fd, 0, tamano)
+            except OSError:
+                pass
+
+        desplazamiento = 0
+        procesos = min(workers, len(rangos))
+        # Rangos en vuelo: dos por proceso para no dejarlos ociosos, sin pasar de MEMORIA_EN_VUELO
+        en_vuelo = max(1, min(2 * procesos, MEMORIA_EN_VUELO // TAMANO_RANGO))
+        with ProcessPoolExecutor(max_workers=procesos) as executor:
+            pendientes = deque()
+            for inicio, fin in rangos:
+                pendientes.append(executor.submit(limpiar_rango, entrada_path, inicio, fin))
+                if len(pendientes) >= en_vuelo:
+                    desplazamiento = escribir_en_posicion(fd, pendientes.popleft().result(), desplazamiento)
+            while pendientes:
+                desplazamiento = escribir_en_posicion(fd, pendientes.popleft().result(), desplazamiento)
+
+        os.ftruncate(fd, desplazamiento)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+# Versión registrada en el manifiesto; cambiarla invalida las salidas ya generadas
+VERSION = "1.0"
+
+# Manifiesto de salidas generadas, dentro de la carpeta de salida
+ARCHIVO_MANIFIESTO = "manifiesto_quitaespeciales.json"
+
+# Función para limpiar un archivo sin detener el lote si falla.
+# Se escribe en un temporal de la carpeta de salida que se renombra al terminar: la salida
+# nunca queda a medio escribir. Devuelve el resultado del archivo en lugar de registrar logs (se registran en orden en el proceso principal).
+def limpiar_archivo_aislado(entrada_path, salida_path, workers_por_archivo=1):
+    inicio = time.perf_counter()
+    directorio, nombre = os.path.split(salida_path)
+    temporal = os.path.join(directorio, f".{nombre}.{os.getpid()}.tmp")
+    firma = None
+    try:
+        # La firma se toma antes de leer la entrada: si cambia mientras se limpia, el
+        # manifiesto no la dará por procesada en la próxima ejecución
+        firma = firma_archivo(entrada_path)
+        if workers_por_archivo != 1 and os.path.getsize(entrada_path) > TAMANO_RANGO:
+            limpiar_archivo_paralelo(entrada_path, temporal, workers_por_archivo)
+        else:
+            limpiar_archivo(entrada_path, temporal)
+        os.replace(temporal, salida_path)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        if os.path.exists(temporal):
+            os.remove(temporal)
+    return {
+        'archivo': os.path.basename(entrada_path),
+        'salida': salida_path,
+        'exito': error is None,
+        'omitido': False,
+        'segundos': round(time.perf_counter() - inicio, 3),
+        'error': error,
+        'firma': firma,
+    }
+
+# Función para registrar el resultado de un archivo
+def registrar_resultado(resultado):
+    if resultado['omitido']:
+        logging.info(f"Sin cambios, se omite: {resultado['archivo']}")
+    elif resultado['exito']:
+        logging.info(f"Archivo procesado guardado en: {resultado['salida']} ({resultado['segundos']:.2f}s)")
+    else:
+        logging.error(f"Error procesando {resultado['archivo']}: {resultado['error']}")
+
+# Función principal para procesar los archivos.
+# Con workers > 1 los archivos se limpian en paralelo en un pool de procesos (None o 0 usa todos los núcleos).
+# Con workers_por_archivo != 1 los archivos se recorren de uno en uno y los mayores que TAMANO_RANGO
+# se dividen entre ese número de procesos (None o 0 usa todos los núcleos).
+# Con incremental=True se omiten los archivos cuya salida está al día según el manifiesto.
+def procesar_archivos(directorio_entrada, directorio_salida, workers=1, workers_por_archivo=1, incremental=True):
     if not os.path.exists(directorio_salida):
         os.makedirs(directorio_salida)
         logging.info(f"Carpeta '{directorio_salida}' creada.")
-    archivos = [f for f in os.listdir(directorio_entrada) if os.path.isfile(os.path.join(directorio_entrada, f))]
+    archivos = sorted(f for f in os.listdir(directorio_entrada) if os.path.isfile(os.path.join(directorio_entrada, f)))
     if not archivos:
         logging.warning("No hay archivos para procesar.")
-        return
+        return []
 
+    ruta_manifiesto = os.path.join(directorio_salida, ARCHIVO_MANIFIESTO)
+    manifiesto = cargar_manifiesto(ruta_manifiesto)
+    omitidos = {}
+    entradas = []
+    salidas = []
     for archivo in archivos:
         entrada_path = os.path.join(directorio_entrada, archivo)
         salida_path = os.path.join(directorio_salida, archivo)
-        logging.info(f"Procesando archivo: {archivo}")
+        if incremental and salida_al_dia(manifiesto, VERSION, entrada_path, salida_path):
+            omitidos[archivo] = {'archivo': archivo, 'salida': salida_path, 'exito': True,
+                                 'omitido': True, 'segundos': 0.0, 'error': None}
+        else:
+            entradas.append(entrada_path)
+            salidas.append(salida_path)
+
+    workers = min(workers or os.cpu_count() or 1, max(len(entradas), 1))
+    if workers_por_archivo != 1 and workers != 1:
+        logging.warning("Con workers por archivo los archivos se procesan de uno en uno; se ignora --workers")
+        workers = 1
+
+    if workers == 1:
+        procesados = []
+        for entrada_path, salida_path in zip(entradas, salidas):
+            logging.info(f"Procesando archivo: {os.path.basename(entrada_path)}")
+            resultado = limpiar_archivo_aislado(entrada_path, salida_path, workers_por_archivo)
+            registrar_resultado(resultado)
+            procesados.append(resultado)
+    else:
+        logging.info(f"Procesando {len(entradas)} archivos con {workers} procesos")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            procesados = list(executor.map(limpiar_archivo_aislado, entradas, salidas))
+        for resultado in procesados:
+            registrar_resultado(resultado)
 
-        with open(entrada_path, 'r', encoding='utf-8') as f_in, \
-             open(salida_path, 'w', encoding='utf-8') as f_out:
-            for linea in f_in:
-                linea = limpiar_texto(linea)
-                linea = linea.replace(';033;', ';33;')
-                linea = linea.replace(';011001;', ';11001;')
-                f_out.write(linea)
-        logging.info(f"Archivo procesado guardado en: {salida_path}")
+    # Registrar en el manifiesto solo lo generado correctamente
+    for resultado in procesados:
+        firma = resultado.pop('firma')
+        if resultado['exito']:
+            manifiesto[resultado['archivo']] = {'version': VERSION, 'entrada': firma}
+        else:
+            manifiesto.pop(resultado['archivo'], None)
+    if procesados:
+        guardar_manifiesto(ruta_manifiesto, manifiesto)
+
+    por_archivo = {resultado['archivo']: resultado for resultado in procesados}
+    por_archivo.update(omitidos)
+    resultados = [por_archivo[archivo] for archivo in archivos]
+
+    for resultado in omitidos.values():
+        registrar_resultado(resultado)
+    exitosos = sum(1 for resultado in procesados if resultado['exito'])
+    logging.info(
+        f"Resumen: {exitosos} archivos procesados, {len(omitidos)} sin cambios, "
+        f"{len(procesados) - exitosos} con error"
+    )
+    return resultados
 
 if __name__ == "__main__":
-    procesar_archivos('data', 'procesados')
+    parser = argparse.ArgumentParser(description="Quita tildes y ñ de los archivos de una carpeta")
+    parser.add_argument("entrada", nargs="?", default="data", help="Carpeta de entrada")
+    parser.add_argument("salida", nargs="?", default="procesados", help="Carpeta de salida")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos en paralelo (0 usa todos los núcleos)")
+    parser.add_argument("--workers-por-archivo", type=int, default=1,
+                        help="Procesos para dividir cada archivo grande (0 usa todos los núcleos)")
+    parser.add_argument("--forzar", action="store_true",
+                        help="Reprocesar aunque las salidas estén al día según el manifiesto")
+    args = parser.parse_args()
+
+    procesar_archivos(args.entrada, args.salida, workers=args.workers,
+                      workers_por_archivo=args.workers_por_archivo, incremental=not args.forzar)
@@ -1,10 +1,19 @@
 # main.py
 from utils import procesar_archivos
+import argparse
 import os
 
 if __name__ == "__main__":
-    carpeta_entrada = "data"
-    carpeta_salida = "procesados"
+    parser = argparse.ArgumentParser(description="Limpia tildes y ñ de los CSV de una carpeta")
+    parser.add_argument("--entrada", default="data", help="Carpeta de entrada")
+    parser.add_argument("--salida", default="procesados", help="Carpeta de salida")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos en paralelo (0 usa todos los núcleos)")
+    parser.add_argument("--forzar", action="store_true",
+                        help="Reprocesar aunque las salidas estén al día según el manifiesto")
+    args = parser.parse_args()
+
+    carpeta_entrada = args.entrada
+    carpeta_salida = args.salida
 
     os.makedirs(carpeta_salida, exist_ok=True)
-    procesar_archivos(carpeta_entrada, carpeta_salida)
+    procesar_archivos(carpeta_entrada, carpeta_salida, workers=args.workers, incremental=not args.forzar)
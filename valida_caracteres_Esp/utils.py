@@ -1,29 +1,51 @@
 # utils.py
 import os
+import sys
 import pandas as pd
 import re
+import time
 import logging
+from concurrent.futures import ProcessPoolExecutor
+
+# Las funciones compartidas con los demás scripts están en la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comun import firma_archivo, cargar_manifiesto, guardar_manifiesto, salida_al_dia, guardar_csv, nombre_salida
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+# Reemplazo de vocales con tilde y Ñ/ñ
+TRADUCCIONES = str.maketrans(
+    "áéíóúÁÉÍÓÚñÑ",
+    "aeiouAEIOUnN"
+)
+
+# Reemplazos exactos de patrones
+PATRONES = [(";033;", ";33;"), (";011001;", ";11001;")]
+
 def limpiar_texto(texto):
     if pd.isnull(texto):
         return texto
 
-    texto = str(texto)
-    # Reemplazo de vocales con tilde y Ñ/ñ
-    traducciones = str.maketrans(
-        "áéíóúÁÉÍÓÚñÑ",
-        "aeiouAEIOUnN"
-    )
-    texto = texto.translate(traducciones)
-
-    # Reemplazos exactos de patrones
-    texto = texto.replace(";033;", ";33;")
-    texto = texto.replace(";011001;", ";11001;")
+    texto = str(texto).translate(TRADUCCIONES)
+    for patron, reemplazo in PATRONES:
+        texto = texto.replace(patron, reemplazo)
 
     return texto
 
+def requiere_limpieza(columna):
+    # Una columna solo ASCII (las numéricas lo son) y sin ';' no cambia al limpiarla
+    texto = "".join(columna.dropna().astype(str))
+    return not texto.isascii() or ";" in texto
+
+def limpiar_columna(columna):
+    columna = columna.str.translate(TRADUCCIONES)
+    for patron, reemplazo in PATRONES:
+        columna = columna.str.replace(patron, reemplazo, regex=False)
+    return columna
+
+def ruta_salida(carpeta_salida, nombre_archivo):
+    return os.path.join(carpeta_salida, nombre_salida(nombre_archivo))
+
 def procesar_archivo(ruta_archivo, carpeta_salida):
     nombre_archivo = os.path.basename(ruta_archivo)
     logging.info(f"Procesando archivo: {nombre_archivo}")
@@ -36,16 +58,134 @@ def procesar_archivo(ruta_archivo, carpeta_salida):
             logging.warning(f"Error con codificación {encoding}: {e}")
     else:
         logging.error(f"No se pudo leer el archivo {nombre_archivo}")
-        return
+        return None
 
-    df = df.applymap(limpiar_texto)
+    columnas = [col for col in df.columns
+                if pd.api.types.is_string_dtype(df[col].dtype) and requiere_limpieza(df[col])]
+    for col in columnas:
+        df[col] = limpiar_columna(df[col])
+    logging.info(f"Columnas limpiadas: {len(columnas)} de {len(df.columns)}")
 
-    salida = os.path.join(carpeta_salida, nombre_archivo)
-    df.to_csv(salida, sep=';', index=False, encoding='utf-8')
+    salida = ruta_salida(carpeta_salida, nombre_archivo)
+    guardar_csv(df, salida)
     logging.info(f"Archivo guardado en: {salida}")
+    return salida
+
+# Versión registrada en el manifiesto; cambiarla invalida las salidas ya generadas
+VERSION = "1.0"
+
+# Manifiesto de salidas generadas, dentro de la carpeta de salida
+ARCHIVO_MANIFIESTO = "manifiesto_valida_caracteres.json"
+
+class RegistrosEnMemoria(logging.Handler):
+    """Guarda los logs de un proceso del pool para emitirlos en orden desde el principal."""
+
+    def __init__(self):
+        super().__init__()
+        self.registros = []
+
+    def emit(self, record):
+        self.registros.append((record.levelno, record.getMessage()))
+
+_registros_worker = None
 
-def procesar_archivos(carpeta_entrada, carpeta_salida):
-    for archivo in os.listdir(carpeta_entrada):
-        if archivo.lower().endswith('.csv'):
-            ruta = os.path.join(carpeta_entrada, archivo)
-            procesar_archivo(ruta, carpeta_salida)
+def inicializar_worker():
+    global _registros_worker
+    _registros_worker = RegistrosEnMemoria()
+    logging.getLogger().handlers[:] = [_registros_worker]
+
+def procesar_archivo_aislado(ruta_archivo, carpeta_salida):
+    # Un error en un archivo queda en su resultado y no detiene el lote
+    if _registros_worker is not None:
+        _registros_worker.registros.clear()
+
+    inicio = time.perf_counter()
+    firma = None
+    try:
+        # La firma se toma antes de leer la entrada: si cambia mientras se procesa, el
+        # manifiesto no la dará por procesada en la próxima ejecución
+        firma = firma_archivo(ruta_archivo)
+        salida = procesar_archivo(ruta_archivo, carpeta_salida)
+        error = None if salida else "no se pudo leer el archivo"
+    except Exception as e:
+        salida = None
+        error = f"{type(e).__name__}: {e}"
+
+    return {
+        'archivo': os.path.basename(ruta_archivo),
+        'salida': salida,
+        'exito': error is None,
+        'omitido': False,
+        'segundos': round(time.perf_counter() - inicio, 3),
+        'error': error,
+        'firma': firma,
+        'registros': list(_registros_worker.registros) if _registros_worker is not None else [],
+    }
+
+def registrar_resultado(resultado):
+    for nivel, mensaje in resultado.pop('registros'):
+        logging.log(nivel, mensaje)
+    if resultado['omitido']:
+        logging.info(f"Sin cambios, se omite: {resultado['archivo']}")
+    elif not resultado['exito']:
+        logging.error(f"Error procesando {resultado['archivo']}: {resultado['error']}")
+
+def procesar_archivos(carpeta_entrada, carpeta_salida, workers=1, incremental=True):
+    archivos = [archivo for archivo in sorted(os.listdir(carpeta_entrada)) if archivo.lower().endswith('.csv')]
+    if not archivos:
+        logging.warning("No hay archivos para procesar.")
+        return []
+
+    # Con incremental se omiten los archivos cuya salida está al día según el manifiesto
+    ruta_manifiesto = os.path.join(carpeta_salida, ARCHIVO_MANIFIESTO)
+    manifiesto = cargar_manifiesto(ruta_manifiesto)
+    omitidos = {}
+    rutas = []
+    for archivo in archivos:
+        ruta = os.path.join(carpeta_entrada, archivo)
+        if incremental and salida_al_dia(manifiesto, VERSION, ruta, ruta_salida(carpeta_salida, archivo)):
+            omitidos[archivo] = {'archivo': archivo, 'salida': ruta_salida(carpeta_salida, archivo),
+                                 'exito': True, 'omitido': True, 'segundos': 0.0, 'error': None,
+                                 'registros': []}
+        else:
+            rutas.append(ruta)
+
+    # workers None o 0 usa todos los núcleos
+    workers = min(workers or os.cpu_count() or 1, max(len(rutas), 1))
+
+    if workers == 1:
+        procesados = []
+        for ruta in rutas:
+            resultado = procesar_archivo_aislado(ruta, carpeta_salida)
+            registrar_resultado(resultado)
+            procesados.append(resultado)
+    else:
+        logging.info(f"Procesando {len(rutas)} archivos con {workers} procesos")
+        with ProcessPoolExecutor(max_workers=workers, initializer=inicializar_worker) as executor:
+            procesados = list(executor.map(procesar_archivo_aislado, rutas, [carpeta_salida] * len(rutas)))
+        for resultado in procesados:
+            registrar_resultado(resultado)
+
+    # Registrar en el manifiesto solo lo generado correctamente
+    for resultado in procesados:
+        firma = resultado.pop('firma')
+        if resultado['exito']:
+            manifiesto[resultado['archivo']] = {'version': VERSION, 'entrada': firma}
+        else:
+            manifiesto.pop(resultado['archivo'], None)
+    if procesados:
+        guardar_manifiesto(ruta_manifiesto, manifiesto)
+
+    for resultado in omitidos.values():
+        registrar_resultado(resultado)
+
+    por_archivo = {resultado['archivo']: resultado for resultado in procesados}
+    por_archivo.update(omitidos)
+    resultados = [por_archivo[archivo] for archivo in archivos]
+
+    exitosos = sum(1 for resultado in procesados if resultado['exito'])
+    logging.info(
+        f"Resumen: {exitosos} archivos procesados, {len(omitidos)} sin cambios, "
+        f"{len(procesados) - exitosos} con error"
+    )
+    return resultados